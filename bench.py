@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Bench makes up corpora of fake files and times the scripts' insides on them,
+so you can tell whether a change made things faster or slower without a real game rip at hand.
+
+The corpora come from a seed, so they're the same every time: files of noise with signatures
+at fixed offsets (the same in every file, and a few variants of one for SigWars), relative pointer tables
+for FindPtrs, some byte-identical copies, and a diec -dbuj dump of made-up detections for TestCase.
+That's done for every one of the Scales below: lots of small files, and a few big ones.
+
+Then it times, on each corpus:
+  enumerate - listing the folder into a fresh file index, then again with nothing changed;
+  dupes - filelist.dupes();
+  sigs - the FindSigs compare loop (BaseOffset(), read, mask); sigs.report - writing its reports;
+  diesig - DIESig() on lots of byte strings;
+  ranges - the FindRanges loop (getVariables(), mmap, bitmaps, fields); ranges.report - writing its reports;
+  wars - SigWars reading and grouping the range; sweep - the SigWars sweep over the first SweepLen bytes;
+  ptrs - FindPtrs' folder search of every file;
+  onepass - sigs, ranges and wars together in one pass;
+  sigcheck - SigCheck of a handful of sigs against the corpus;
+  testcase - TestCase reading the dump and checking every block.
+For each: the seconds (the best of --repeat runs), files/s, MB/s and the peak memory Python allocated
+(measured in a separate run, tracemalloc slows things down), all saved to bench.json.
+The files/s and MB/s are of what it actually read: just a window of each file for most, and only the files
+before it gave up for sigs. The reports read nothing and enumerate reads no bytes, so there's none for those.
+The scripts run with their settings as they are, so bench the same settings to compare.
+The files are read from the OS cache, so this is about the CPU side; the disk is yours to measure.
+
+Run "bench.py --compare old.json" to see how this run does against an older one: whatever's
+more than Tolerance times slower gets a "SLOWER" next to it.
+
+Conceived and created by Kaens Bard, 2024.
+Works on CPython 3.13.
+"""
+
+import argparse, collections, json, os, platform, random, shutil, sys, tempfile, time, tracemalloc
+import numpy as np
+import filelist, findsigs, findranges, findptrs, sigwars, sigcheck, testcase, onepass
+
+# CHANGE THESE TO FIT YOUR NEEDS:
+Seed = 1
+Scales = {"many small": (4000,0x800), "few big": (40,0x400000)} # name: (how many files, their average size)
+Copies = 0.05 # the share of the files that are byte-identical copies of another one
+Blocks = 20000 # how many files the fake diec dump describes
+SweepLen = 0x40
+Repeat = 3 # the runs to take the best time of (or --repeat N)
+Tolerance = 1.2 # how much slower than the old run counts as slower (or --tolerance T)
+Out = "bench.json"
+
+# Every file has these at these offsets, over the noise
+Sigs = [(0x00,b"BNCH"),(0x10,b"\x00\x01\x02\x03"),(0x200,b"tail of the header")]
+Variants = [b"V1", b"V2", b"V3", b"X!"] # one of these at VariantAt, for SigWars
+VariantAt = 4
+TableAt = 0x80; TableLen = 16 # the pointers to findptrs.DataAt, every 4 bytes
+
+def genFiles(d,n,size,rng):
+	# writes n files of noise around size bytes big into the folder d, with the sigs, variants,
+	#pointer tables and copies in them. Returns the total size
+	os.makedirs(d,exist_ok=True); total = 0; made = []
+	for k in range(n):
+		fn = os.path.join(d,f"f{k:06d}.bnc")
+		if made and rng.random() < Copies:
+			shutil.copyfile(rng.choice(made),fn); total += os.path.getsize(fn); continue
+		sz = int(size*rng.uniform(0.5,1.5))
+		B = bytearray(np.random.default_rng(rng.getrandbits(64)).integers(0,256,sz,dtype=np.uint8).tobytes())
+		for ofs,s in Sigs: B[ofs:ofs+len(s)] = s
+		B[VariantAt:VariantAt+2] = rng.choice(Variants)
+		for i in range(TableLen):
+			at = TableAt+i*4; v = findptrs.DataAt-at*findptrs.Rel+rng.randint(-findptrs.Jitter,findptrs.Jitter)
+			B[at:at+2] = int(v).to_bytes(2,"big",signed=True)
+		open(fn,"wb").write(B); made.append(fn); total += sz
+	return total
+
+def genDump(fn,n,rng):
+	# writes a fake diec -dbuj dump of n files. Returns its size
+	names = ["ProTracker (.mod,.m15)","OctaMED (.med,mmd.)","Amiga loadable file","plain text","Something","Unknown"]
+	o = open(fn,"w",encoding="utf-8")
+	for k in range(n):
+		o.write(f"/rips/some/folder/file{k}{rng.choice(['.mod','.med','.bin',''])}:\n")
+		if rng.random() < 0.02: o.write("Error: can't open the file\n\n"); continue
+		V = [{"name": nm, "type": "Unknown" if nm == "Unknown" else "Format", "string": nm,
+			"info": rng.choice(["","sz:1234(-56!)","sz:99 ok","x sz:7(-1!) y"])} for nm in rng.sample(names,rng.choice([1,1,1,2,3]))]
+		o.write(json.dumps({"detects": [{"filetype": "Binary", "parentfilepart": "Header", "values": V}]},indent=4)+"\n\n")
+	o.close()
+	return os.path.getsize(fn)
+
+def run(f,repeat):
+	# the best time of repeat runs of f(), the peak memory of one more under tracemalloc,
+	#and what f() says it's been through
+	best = float("inf")
+	for _ in range(repeat):
+		t = time.perf_counter(); got = f(); best = min(best,time.perf_counter()-t)
+	tracemalloc.start(); f(); peak = tracemalloc.get_traced_memory()[1]; tracemalloc.stop()
+	return best,peak,got
+
+def benches(d,dump,work):
+	# what gets timed on the corpus in d: name → the function to time, which returns (files, bytes) it's read
+	idx = os.path.join(work,"bench.idx")
+	I = filelist.FileIndex(idx); I.update(d); I.save(); L = I.files(d)
+	files = lambda: L
+	def enumerate_(): # it's listed twice, and the files aren't opened at all
+		if os.path.exists(idx): os.remove(idx)
+		I = filelist.FileIndex(idx); I.update(d); I.save()
+		I = filelist.FileIndex(idx); I.update(d); I.files(d)
+		return 2*len(L),0
+	sizes = collections.Counter(s for _,s in L)
+	def dupes(): # the first Prefix bytes of the files sharing their size, then the whole of the ones still alike
+		_,G = filelist.dupes(files(),filelist.FileIndex(idx)); sz = dict(L)
+		shared = [fn for fn,s in L if sizes[s] > 1]; whole = [x for fn,C in G.items() for x in [fn]+C]
+		return len(shared),sum(min(sz[fn],filelist.Prefix) for fn in shared)+sum(sz[fn] for fn in whole)
+	cbDone = None
+	def sigs(): # up to the file that leaves no hope
+		nonlocal cbDone
+		cb = cbDone = findsigs.CommonBytes(findsigs.MaxOfs); n = b = 0
+		for fn,_ in files():
+			f = open(fn,'rb'); ofs,w = cb.window(f); f.seek(ofs); F = f.read(min(w,cb.Sz)); f.close()
+			n += 1; b += len(F)
+			if not cb.feed(fn,np.frombuffer(F,dtype=np.uint8)): break
+		return n,b
+	sigs()
+	def sigsReport():
+		rep = findsigs.SigReport(os.path.join(work,"findsigs.bnc"),cbDone.base); cbDone.report(rep); rep.close()
+		return 0,0
+	rnd = random.Random(Seed); strs = [rnd.randbytes(rnd.randint(2,32)) for _ in range(20000)]
+	def diesig():
+		for s in strs: findsigs.DIESig(s)
+		return len(strs),sum(map(len,strs))
+	rDone = None
+	def ranges():
+		nonlocal rDone
+		V = rDone = findranges.ValueRanges(findranges.Sz)
+		for fn,_ in files(): findranges.scanFile(fn,V)
+		return len(L),V.bytes
+	ranges()
+	def rangesReport():
+		cwd = os.getcwd(); os.chdir(work)
+		try: rDone.report(".bnc")
+		finally: os.chdir(cwd)
+		return 0,0
+	def wars():
+		V = sigwars.Variants(VariantAt,2); b = 0
+		for fn,_ in files():
+			i = sigwars.readRange(fn,VariantAt,2); V.feed(fn,i); b += len(i)
+		return len(L),b
+	def sweep():
+		Fs = files(); X = np.full((len(Fs),SweepLen),256,dtype=np.uint16); b = 0
+		for k,(fn,_) in enumerate(Fs):
+			i = sigwars.readRange(fn,0,SweepLen); X[k,:len(i)] = np.frombuffer(i,dtype=np.uint8); b += len(i)
+		sigwars.sweep(X)
+		return len(Fs),b
+	def ptrs(): # every file gets decoded whole
+		findptrs.initWorker(None)
+		for fn,_ in files(): findptrs.searchFile(fn)
+		return len(L),sum(s for _,s in L)
+	def one():
+		left = [findsigs.CommonBytes(findsigs.MaxOfs),findranges.ValueRanges(findranges.Sz),sigwars.Variants(VariantAt,2)]; n = b = 0
+		for fn,_ in files():
+			if not left: break
+			left,r = onepass.feedFile(fn,left); n += 1; b += r
+		return n,b
+	sigfile = os.path.join(work,"bench.sigs.txt")
+	open(sigfile,"w").write("".join(f"{findsigs.DIESig(s)}, 0x{o:02X}\n" for o,s in Sigs)+"".join(f"{findsigs.DIESig(v)}, 0x{VariantAt:02X}\n" for v in Variants))
+	sigcheck.setup(sigcheck.loadSigs([sigfile],0))
+	# the bytes at the sigs' offsets, in as far as a file has them (they're all from the start, none floating)
+	checked = sum(max(0,min(n,s-ofs)) for _,s in L for (_,ofs),(n,_,_) in sigcheck.Index.items())
+	def check():
+		sigcheck.checkShard([fn for fn,_ in files()])
+		return len(L),checked
+	def tc():
+		fi = open(dump,encoding="utf-8"); o = open(os.path.join(work,"testcase.report.txt"),"w",encoding="utf-8-sig")
+		for B in testcase.batches(testcase.blocks(fi)):
+			for _,(L,_) in testcase.checkBatch(B): o.writelines(L)
+		fi.close(); o.close()
+		return Blocks,os.path.getsize(dump)
+	return {"enumerate": enumerate_, "dupes": dupes, "sigs": sigs, "sigs.report": sigsReport, "diesig": diesig,
+		"ranges": ranges, "ranges.report": rangesReport, "wars": wars, "sweep": sweep, "ptrs": ptrs,
+		"onepass": one, "sigcheck": check, "testcase": tc}
+
+def main():
+	ap = argparse.ArgumentParser(description="Times the scripts on made-up corpora and saves the numbers.")
+	ap.add_argument("--repeat",type=int,default=Repeat,metavar="N",help="take the best time of N runs")
+	ap.add_argument("--only",metavar="LIST",help="just these benchmarks, comma-separated")
+	ap.add_argument("--out",default=Out,metavar="FILE",help=f"where the numbers go (default: {Out})")
+	ap.add_argument("--compare",metavar="OLD",help="a bench.json from before to compare to")
+	ap.add_argument("--tolerance",type=float,default=Tolerance,metavar="T",help="how many times slower is slower")
+	ap.add_argument("--dir",metavar="DIR",help="where to make the corpora (default: a temporary folder, deleted after)")
+	a = ap.parse_args()
+	top = a.dir or tempfile.mkdtemp(prefix="bench"); rng = random.Random(Seed)
+	res = {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count(),
+		"seed": Seed, "results": {}}
+	old = json.load(open(a.compare,encoding="utf-8"))["results"] if a.compare else {}
+	try:
+		work = os.path.join(top,"work"); os.makedirs(work,exist_ok=True)
+		dump = os.path.join(top,"testcase.txt")
+		print("Making up the diec dump...",flush=True); genDump(dump,Blocks,rng)
+		for scale,(n,size) in Scales.items():
+			d = os.path.join(top,scale.replace(" ","_"))
+			print(f"Making up {n} files of about {size} bytes...",flush=True)
+			if not os.path.isdir(d): genFiles(d,n,size,rng)
+			R = res["results"][scale] = {}
+			for name,f in benches(d,dump,work).items():
+				if a.only and name not in a.only.split(","): continue
+				t,peak,(files,read) = run(f,a.repeat)
+				R[name] = {"seconds": round(t,4), "files": files, "bytes": read, "files/s": round(files/t,1) if files else None,
+					"MB/s": round(read/t/1e6,2) if read else None, "peak MB": round(peak/1e6,2)}
+				was = old.get(scale,{}).get(name)
+				vs = f", {was['seconds']/t:.2f}x{'  SLOWER' if t > was['seconds']*a.tolerance else ''}" if was else ""
+				rate = (f", {files/t:.0f} files/s" if files else "")+(f", {read/t/1e6:.1f} MB/s" if read else "")
+				print(f"  {scale}: {name}: {t:.3f}s{rate}, {peak/1e6:.1f} MB peak{vs}")
+	finally:
+		if not a.dir: shutil.rmtree(top,ignore_errors=True)
+	json.dump(res,open(a.out,"w",encoding="utf-8"),indent=1)
+	print(f"Saved to {a.out}.")
+
+if __name__ == "__main__":
+	main()
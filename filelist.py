@@ -1,12 +1,303 @@
-# Extremely simplistic, saves a recursive filelist to simplify searches across big file collections
-import os
-L=[]
-exclude=[os.path.join(".","filelist.py"),os.path.join(".","filelist.txt"),os.path.join(".","filelist.py.txt")]
-print("Please wait patiently...")
-for r,_,fs in os.walk("."):
-	for f in fs:
-		fn = os.path.join(r,f)
-		if fn not in exclude:
-			L.append(fn+'\n')
-
-open("filelist.py.txt","w",encoding="utf-8-sig").writelines(L)
+# Extremely simplistic, saves a recursive filelist to simplify searches across big file collections.
+# It also keeps filelist.idx, an index of the folders it's seen (file names, sizes, mtimes, content hashes),
+#which the other scripts read their file lists from: only the folders changed since the last time get listed again.
+# The index notices the files added, removed and renamed. Edited a file in place? Run this with --full.
+# Run it with no arguments for the current folder, or with the folder name. --hash hashes every file right away,
+#otherwise the hashes only get counted when something asks for them.
+# The scripts that can (findsigs, findranges, sigwars) also look into the .zip and .tar(.gz, .bz2, .xz) files
+#as if they were folders: their files are listed as archive.zip/path/in/it (the listing is kept in the index
+#till the archive changes), filtered by Ext on their names, and openFile() reads them without extracting anything:
+#only the bytes read get decompressed. A .tar.gz can only be read on, not back, so its files come in its order.
+import argparse, bz2, collections, contextlib, gzip, hashlib, io, lzma, mmap, os, pickle, tarfile, threading, zipfile, zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+Index = "filelist.idx" # where the index is kept
+Threads = 32 # how many folders to list at once, it's mostly waiting for the disk (or the network share)
+Prefix = 0x1000 # how much of the same-sized files to hash first when looking for duplicates
+Archives = {".zip": "zip", ".tar": "", ".tar.gz": "gz", ".tgz": "gz", ".tar.bz2": "bz2", ".tbz2": "bz2",
+	".tar.xz": "xz", ".txz": "xz"} # what can be looked into, and how it's compressed
+Decompress = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+StreamCap = 0x100 # how many decompressed streams to keep open for reading on from where they are
+
+def scanDir(d,old,full):
+	# lists a folder as (mtime, [(subfolder, is a link)], [[name, size, mtime, hash(, an archive's listing)]]),
+	#unless its mtime says nothing's been added, removed or renamed in it since the old entry
+	try:
+		st = os.stat(d)
+		if old is not None and not full and old[0] == st.st_mtime_ns: return d,old
+		subs = []; fs = []; oldfs = {f[0]: f for f in old[2]} if old else {}
+		with os.scandir(d) as it:
+			for e in it:
+				try:
+					if e.is_dir():
+						subs.append((e.name,e.is_symlink())) # linked folders are listed but not walked, like os.walk does
+					else:
+						s = os.stat(e.path); o = oldfs.get(e.name)
+						same = o and o[1] == s.st_size and o[2] == s.st_mtime_ns # the hash (and an archive's listing) is good if the file is
+						fs.append([e.name,s.st_size,s.st_mtime_ns,o[3] if same else None]+(o[4:] if same else []))
+				except OSError: pass # vanished or broken links
+		return d,(st.st_mtime_ns,subs,fs)
+	except OSError:
+		return d,None # unreadable folders get skipped, like os.walk does
+
+def archiveType(fn):
+	# how the archive is compressed ("" for a plain .tar), or None if it's not one
+	low = fn.lower()
+	return next((c for ext,c in Archives.items() if low.endswith(ext)),None)
+
+def archiveOf(fn):
+	# (the archive, the name in it) for a file in an archive, None for a real file
+	low = fn.lower()
+	for ext in Archives:
+		i = low.find(ext+os.sep)
+		while i >= 0:
+			a = fn[:i+len(ext)]
+			if os.path.isfile(a): return a,fn[i+len(ext)+1:].replace(os.sep,"/")
+			i = low.find(ext+os.sep,i+1)
+	return None
+
+def listArchive(fn):
+	# the files in an archive as [[name, size, where its data starts in the .tar, hash]]. A zip's listing is all
+	#in its central directory, but a .tar.gz gets decompressed through, as its headers are all over it
+	c = archiveType(fn)
+	if c == "zip":
+		with zipfile.ZipFile(fn) as z: return [[i.filename,i.file_size,None,None] for i in z.infolist() if not i.is_dir()]
+	with tarfile.open(fn,"r:"+c) as t: return [[i.name,i.size,i.offset_data,None] for i in t if i.isfile()]
+
+Listed = {} # archive → {name: its listArchive() entry}, the listings gone through this run
+Opened = {} # (process, archive) → its ZipFile, kept open for the run.
+#A forked worker can't read the parent's: they'd share the file position
+Idle = collections.OrderedDict() # ((process, archive(, name in the zip)), id) → a decompressed stream of a .tar.gz
+#or of a file in a zip that's not being read, the least recently used first
+OpenLock = threading.Lock()
+
+def takeStream(key,pos,new):
+	# a free decompressed stream not past pos, so getting there is just reading on: going back means
+	#decompressing it all again from the start. Every thread reading gets its own, new() if there's none
+	with OpenLock:
+		k = max((k for k,s in Idle.items() if k[0] == key and s.tell() <= pos),key=lambda k: Idle[k].tell(),default=None)
+		if k is not None: return Idle.pop(k)
+	return new()
+
+def giveStream(key,s):
+	# the stream's free again, and the one not read the longest goes if there's too many
+	with OpenLock:
+		Idle[(key,id(s))] = s
+		while len(Idle) > StreamCap: Idle.popitem(last=False)[1].close()
+
+class Member(io.RawIOBase):
+	# a file in an archive, read (and seeked) like a real one
+	def __init__(self,fn,a,name):
+		self.name = fn; self.a = a; self.c = archiveType(a); self.pos = 0; self.f = None
+		if self.c == "zip": # each file in it is a stream of its own
+			with OpenLock:
+				k = (os.getpid(),a); z = Opened.get(k) or Opened.setdefault(k,zipfile.ZipFile(a))
+			self.size = z.getinfo(name).file_size; self.start = 0
+			self.key = (os.getpid(),a,name); self.new = lambda: z.open(name)
+		else:
+			if a not in Listed: Listed[a] = {m[0]: m for m in listArchive(a)}
+			_,self.size,self.start,_ = Listed[a][name]
+			if self.c == "": self.f = open(a,'rb') # a plain .tar seeks like any file
+			else: self.key = (os.getpid(),a); self.new = lambda: Decompress[self.c](a)
+
+	def readable(self): return True
+	def seekable(self): return True
+	def tell(self): return self.pos
+
+	def seek(self,ofs,whence=0):
+		self.pos = max(0,(0,self.pos,self.size)[whence]+ofs)
+		return self.pos
+
+	def readinto(self,b):
+		n = max(0,min(len(b),self.size-self.pos))
+		if n == 0: return 0
+		f = self.f or takeStream(self.key,self.start+self.pos,self.new)
+		try:
+			f.seek(self.start+self.pos); n = f.readinto(memoryview(b)[:n])
+		finally:
+			if self.f is None: giveStream(self.key,f)
+		self.pos += n
+		return n
+
+	def close(self):
+		if getattr(self,"f",None) is not None: self.f.close() # the decompressed streams stay for the next ones
+		super().close()
+
+def openFile(fn):
+	# opens a file to read, be it a real one or one in an archive
+	a = archiveOf(fn)
+	return open(fn,'rb') if a is None else Member(fn,*a)
+
+@contextlib.contextmanager
+def mapFile(fn,ofs=0,n=-1):
+	# the n bytes of the file from ofs on (as many as there are for -1), memory-mapped, or for a file in an archive,
+	#which can't be, read: just those get decompressed. A negative ofs is from the end
+	with openFile(fn) as f:
+		size = f.seek(0,2); ofs = min(max(0,ofs+size if ofs < 0 else ofs),size)
+		n = size-ofs if n < 0 else min(n,size-ofs)
+		if isinstance(f,Member) or n == 0:
+			f.seek(ofs); yield f.read(n); return
+		a = ofs-ofs%mmap.ALLOCATIONGRANULARITY # where a mapping can start
+		with mmap.mmap(f.fileno(),ofs+n-a,access=mmap.ACCESS_READ,offset=a) as mm:
+			v = memoryview(mm)[ofs-a:]
+			try: yield v
+			finally: v.release()
+
+def fileHash(fn,n=-1):
+	# the hash of the file's contents, or of its first n bytes
+	h = hashlib.blake2b(digest_size=16)
+	with openFile(fn) as f:
+		if n >= 0: h.update(f.read(n))
+		else:
+			for b in iter(lambda: f.read(0x100000),b''): h.update(b)
+	return h.hexdigest()
+
+class FileIndex:
+	def __init__(self,path=Index):
+		self.path = path; self.dirs = {} # absolute (normcase'd) folder path → its scanDir() entry
+		self.names = {} # folder path → (its entry, {normcase'd file name: the file's entry}), made on the first lookup
+		try:
+			self.dirs = pickle.loads(zlib.decompress(open(path,'rb').read()))
+		except (OSError,ValueError,EOFError,pickle.UnpicklingError,zlib.error):
+			pass # no index or a broken one: it's all getting listed then
+
+	def save(self):
+		open(self.path+".tmp",'wb').write(zlib.compress(pickle.dumps(self.dirs,pickle.HIGHEST_PROTOCOL),1))
+		os.replace(self.path+".tmp",self.path)
+
+	def update(self,top,full=False):
+		# brings the entries under top up to date, listing the changed folders on Threads threads
+		top = os.path.normcase(os.path.abspath(top)); new = {}
+		if os.path.isfile(top): # an archive to look into: its folder's entry is what needs to be up to date
+			d,ent = scanDir(os.path.dirname(top),self.dirs.get(os.path.dirname(top)),full)
+			if ent is not None: self.dirs[d] = ent
+			return
+		with ThreadPoolExecutor(Threads) as pool:
+			running = {pool.submit(scanDir,top,self.dirs.get(top),full)}
+			while running:
+				done,running = wait(running,return_when=FIRST_COMPLETED)
+				for r in done:
+					d,ent = r.result()
+					if ent is None: continue
+					new[d] = ent
+					for n,link in ent[1]:
+						if not link:
+							sd = os.path.normcase(os.path.join(d,n)); running.add(pool.submit(scanDir,sd,self.dirs.get(sd),full))
+		for d in [d for d in self.dirs if d == top or d.startswith(os.path.join(top,''))]:
+			del self.dirs[d] # the folders gone since
+		self.dirs.update(new)
+
+	def walk(self,top):
+		# yields the (folder, file entries) pairs in the same order os.walk(top) would
+		ent = self.dirs.get(os.path.normcase(os.path.abspath(top)))
+		if ent is None: return
+		yield top,ent[2]
+		for n,link in ent[1]:
+			if not link: yield from self.walk(os.path.join(top,n))
+
+	def files(self,top,Ext="",archives=False):
+		# the (path, size) of every file under top with the extension Ext ("" for any),
+		#named just like the scripts name them when they os.walk(top). With archives, the files in the archives
+		#are listed instead of them (top can be an archive, too)
+		ix = os.path.abspath(self.path); Ext = Ext.lower(); L = []
+		def want(n): return Ext == "" or os.path.splitext(n)[1].lower() == Ext
+		if os.path.isfile(top): # just the one archive
+			ent = self.dirs.get(os.path.normcase(os.path.abspath(os.path.dirname(top))))
+			walk = [(os.path.dirname(top),[f for f in ent[2] if f[0] == os.path.basename(top)] if ent else [])]
+		else: walk = self.walk(top)
+		for r,fs in walk:
+			here = os.path.abspath(r) == os.path.dirname(ix) # don't list the index itself
+			for f in fs:
+				fn = os.path.normcase(os.path.join(r,f[0]))
+				if archives and archiveType(f[0]) is not None:
+					if len(f) < 5: # not listed yet, or changed since
+						try: f.append(listArchive(fn))
+						except (OSError,EOFError,tarfile.TarError,zipfile.BadZipFile,zlib.error,lzma.LZMAError) as e:
+							print(f"\nCan't look into {fn}: {e}"); continue
+					Listed[fn] = {m[0]: m for m in f[4]}
+					L += [(fn+os.sep+m[0].replace("/",os.sep),m[1]) for m in f[4] if want(m[0])]
+				elif want(f[0]) and not (here and f[0] in (os.path.basename(ix),os.path.basename(ix)+".tmp")):
+					L.append((fn,f[1]))
+		return L
+
+	def entry(self,d,n):
+		# the entry of the file n in the folder d, or None
+		ent = self.dirs.get(d)
+		if ent is None: return None
+		D = self.names.get(d)
+		if D is None or D[0] is not ent: # not looked up in yet, or listed again since
+			D = self.names[d] = (ent,{os.path.normcase(f[0]): f for f in ent[2]})
+		return D[1].get(n)
+
+	def hash(self,fn):
+		# the content hash of a file, counted only if it's not in the index yet or the file's changed since
+		a = archiveOf(fn)
+		if a is not None: # a file in an archive: its listing's there till the archive changes
+			m = Listed.get(a[0],{}).get(a[1])
+			if m is None: return fileHash(fn)
+			if m[3] is None: m[3] = fileHash(fn)
+			return m[3]
+		d,n = os.path.split(os.path.normcase(os.path.abspath(fn))); st = os.stat(fn)
+		f = self.entry(d,n)
+		if f is None or f[1] != st.st_size or f[2] != st.st_mtime_ns or f[3] is None:
+			h = fileHash(fn)
+			if f is not None: f[1:] = [st.st_size,st.st_mtime_ns,h]
+			return h
+		return f[3]
+
+def dupes(files,idx=None):
+	# finds the byte-identical files in a (path, size) list: the ones of the same size get their first Prefix bytes
+	#hashed, and the ones that still agree get hashed whole (the index remembers those hashes for the next time).
+	#Returns the list with just the first file of each group, and {that file: [its copies]}
+	sizes = {}; sz = dict(files)
+	for fn,size in files: sizes.setdefault(size,[]).append(fn)
+	todo = [fn for size,L in sizes.items() if len(L) > 1 for fn in L] # a size no other file has is unique already
+	with ThreadPoolExecutor(Threads) as pool:
+		pre = dict(zip(todo,pool.map(fileHash,todo,[Prefix]*len(todo))))
+		keys = {}
+		for fn in todo: keys.setdefault((sz[fn],pre[fn]),[]).append(fn)
+		todo = [fn for (size,_),L in keys.items() if len(L) > 1 and size > Prefix for fn in L] # the prefix was all of them
+		full = dict(zip(todo,pool.map(idx.hash if idx else fileHash,todo)))
+	groups = {}; first = {}
+	for fn,size in files:
+		if fn not in pre: continue
+		k = (size,pre[fn],full.get(fn))
+		if k in first: groups[first[k]].append(fn)
+		else: first[k] = fn; groups[fn] = []
+	dup = {fn for L in groups.values() for fn in L}
+	return [(fn,size) for fn,size in files if fn not in dup], {k: L for k,L in groups.items() if L}
+
+def saveDupes(name,groups):
+	# writes down which files were looked at in place of which copies
+	o = open(name,"w",encoding="utf-8-sig")
+	for fn,L in groups.items():
+		o.write(fn+"\n"+"".join("  = "+x+"\n" for x in L))
+	o.close()
+
+def files(top=".",Ext="",archives=False):
+	# what the other scripts call instead of os.walk: updates the index and returns the (path, size) list
+	idx = FileIndex(); idx.update(top); L = idx.files(top,Ext,archives); idx.save()
+	return L
+
+if __name__ == "__main__":
+	ap = argparse.ArgumentParser(description="Saves a recursive file list, and keeps the file index up to date.")
+	ap.add_argument("folder",nargs="?",default=".",help="the folder to list (default: current)")
+	ap.add_argument("--full",action="store_true",help="list every folder again, changed or not")
+	ap.add_argument("--hash",action="store_true",help="hash the contents of every file that isn't yet")
+	a = ap.parse_args()
+	L=[]
+	exclude=[os.path.join(".","filelist.py"),os.path.join(".","filelist.txt"),os.path.join(".","filelist.py.txt"),os.path.join(".",Index)]
+	print("Please wait patiently...")
+	idx = FileIndex(); idx.update(a.folder,a.full)
+	for r,fs in idx.walk(a.folder):
+		for f in fs:
+			fn = os.path.join(r,f[0])
+			if fn not in exclude:
+				L.append(fn+'\n')
+	if a.hash:
+		todo = [os.path.join(r,f[0]) for r,fs in idx.walk(a.folder) for f in fs if f[3] is None]
+		with ThreadPoolExecutor(Threads) as pool:
+			list(pool.map(idx.hash,todo))
+	idx.save()
+
+	open("filelist.py.txt","w",encoding="utf-8-sig").writelines(L)
@@ -4,6 +4,11 @@ This script automates your desperate attempts to find where in the mixed code-da
 the specific info is referenced, allowing you to search with a known endianness, pointer size,
 in part of the file, and even have a margin of error in case the pointers are off for any reason.
 Run with 1 parameter to check in that file, but it needs tweaking to be effective!
+With --targets list.txt, it looks for the pointers to every offset in that list (one per line, like 0x13)
+in a single pass, and also points out the probable pointer tables: hits following each other at the same stride.
+Give it a folder instead of a file, and it goes through every file in it (see Ext), each with its own DataAt
+from DataOffset(), on --jobs N processes, streaming the hits as JSON lines to findptrs.jsonl (or --out),
+without asking anything. That one's for the build server.
 """
 
 # CHANGE THESE TO FIT YOUR NEEDS:
@@ -29,54 +34,184 @@ Rel = 1 # 1 if you're searching for relative pointers (the reason this script ex
 # (eg. when your data is at 10, and the X found at 4 is 6, X is a relative pointer to your data)
 # 0 for absolute (from start of file) (which doesn't make much sense to run a whole script for)
 
+Targets = "" # a file listing the offsets to look for all at once instead of DataAt (or --targets list.txt)
+TableAtLeast = 3 # how many hits in a row at the same stride make a probable pointer table
+TableStride = 0x10 # the biggest stride between the pointers of a table
 
-import sys,os.path
-if len(sys.argv) > 1:
-	if os.path.exists(sys.argv[1]):
-		FileName = sys.argv[1]
-	else:
-		print("Error: could not find "+sys.argv[1]+". Did you forget the quotes?")
-		exit(-1)
+# For a whole folder:
+Ext = "" # "" for any, otherwise style it as ".ext"
+Jobs = 1 # how many processes to search with (or --jobs N), 0 for all the CPU cores
+Out = "findptrs.jsonl" # where the hits go, a JSON object per file per line (or --out)
+Chunk = 0x40000 # how many offsets to decode the pointers at at a time, so a big file doesn't take all the memory
+def DataOffset(file):
+	"""
+	This function finds the DataAt for each file in the folder, the same way findsigs' BaseOffset() does:
+	it gets the open file, and returns the offset of the data the pointers are sought to.
+	For example, file.seek(0x10); return su(">L",file.read(4))[0] for a header field pointing at it.
+	"""
+	return DataAt
+
+import argparse,json,mmap,os.path
+import numpy as np
+import filelist
+from concurrent.futures import ProcessPoolExecutor
+from struct import calcsize, unpack as su
+
+def bounds(n):
+	# fits From and To to a file of n bytes (it's too small to search if they're within Jitter*2)
+	f,t = From,To
+	if f == -1:
+		f = Jitter #; print('Searching from file start')
+	if t == -1:
+		t = n-PtrSz-Jitter #; print(f'Searching to file end {n:08X} at {t:08X}')
+	if f >= n-PtrSz-Jitter: #; print("From value too big, searching from", Jitter)
+		f = Jitter
+	elif f < Jitter: #; print("From value too little, searching from", Jitter)
+		f = Jitter
+	if t > n-PtrSz-Jitter:
+		t = n-PtrSz-Jitter #; print("To value too big, searching from", t)
+	if t < f:
+		t,f = f,t #; print("To value is smaller than From, swapping")
+	return f,t
+
+def ptrType(Pattern):
+	# the pattern in numpy terms: its byte order (native if it doesn't say), signedness, and size the way struct has it
+	#("@l" is 8 bytes on 64-bit Linux, "<l" is 4)
+	order = {'<':'<','>':'>','!':'>','=':'=','@':'='}.get(Pattern[0],'=')
+	return np.dtype(f"{order}{'i' if Pattern[-1] in 'bhilqn' else 'u'}{calcsize(Pattern)}")
+
+def ptrValues(F,Pattern):
+	# decodes the pointer at every single offset of F at once: the values at offsets k, k+size, k+2*size...
+	#come from one view of the file for each k < size
+	dt = ptrType(Pattern)
+	V = np.empty(max(len(F)-dt.itemsize+1,0),dtype=np.int64)
+	for k in range(dt.itemsize):
+		a = np.frombuffer(F,dtype=dt,count=(len(F)-k)//dt.itemsize,offset=k)
+		V[k::dt.itemsize] = a[:len(V[k::dt.itemsize])]
+	return V
+
+def chunks(F,fr,to):
+	# (V, from, to) for the offsets fr..to of F a Chunk at a time, V being the pointers decoded from just that part
+	#and the size-1 bytes after it, for the ones that straddle into the next part
+	sz = ptrType(Pattern).itemsize
+	for c in range(fr,to,Chunk):
+		e = min(c+Chunk,to); yield ptrValues(F[c:e+sz-1],Pattern),c,e
+
+def findPtrs(V,From,To,DataAt,at=0):
+	# returns the (offset, jitter) pairs where the pointers in the decoded values V reference DataAt,
+	#V[k] being the one at the offset at+k
+	i = np.arange(From,To,dtype=np.int64)
+	d = DataAt-i*Rel-V[From-at:To-at] # the jitter each pointer would need to hit the data
+	hits = np.flatnonzero(np.abs(d) <= Jitter)
+	return zip((hits+From).tolist(),d[hits].tolist())
+
+def findTargets(V,From,To,T,at=0):
+	# returns the (offset, target, jitter) hits of the pointers in V (V[k] being the one at the offset at+k)
+	#at any of the sorted targets T, each pointer looking up the targets within its jitter with a binary search
+	i = np.arange(From,To,dtype=np.int64)
+	at = i*Rel+V[From-at:To-at] # where each pointer points
+	lo = np.searchsorted(T,at-Jitter,'left'); hi = np.searchsorted(T,at+Jitter,'right')
+	k = np.repeat(np.arange(len(at)),hi-lo) # a pointer comes up once for every target it's close enough to
+	t = T[np.arange(len(k))-np.repeat(np.cumsum(hi-lo)-(hi-lo),hi-lo)+lo[k]]
+	return zip((k+From).tolist(),t.tolist(),(t-at[k]).tolist())
+
+def findTables(hits):
+	# groups the hits into (start, stride, [targets]) runs of at least TableAtLeast pointers at the same stride
+	ofs = sorted(dict.fromkeys(i for i,_,_ in hits)); tgt = {}
+	for i,t,_ in hits: tgt.setdefault(i,t)
+	tables = []; k = 0
+	while k < len(ofs)-1:
+		stride = ofs[k+1]-ofs[k]; e = k+1
+		while e < len(ofs)-1 and ofs[e+1]-ofs[e] == stride: e += 1
+		if stride <= TableStride and e-k+1 >= TableAtLeast:
+			tables.append((ofs[k],stride,[tgt[i] for i in ofs[k:e+1]])); k = e+1
+		else:
+			k += 1
+	return tables
+
+def loadTargets(fn):
+	# the sorted offsets listed in a file, one per line (hex as 0x13), #comments allowed
+	return np.unique(np.array([int(l.split('#')[0],0) for l in open(fn) if l.split('#')[0].strip()],dtype=np.int64))
 
-F = open(FileName,'rb').read()
-
-if From == -1:
-	From = Jitter #; print('Searching from file start')
-if To == -1:
-	To = len(F)-PtrSz-Jitter #; print(f'Searching to file end {len(F):08X} at {To:08X}')
-if From >= len(F)-PtrSz-Jitter: #; print("From value too big, searching from", Jitter)
-	From = Jitter
-elif From < Jitter: #; print("From value too little, searching from", Jitter)
-	From = Jitter
-if To > len(F)-PtrSz-Jitter:
-	To = len(F)-PtrSz-Jitter #; print("To value too big, searching from", To)
-if To < From:
-	To,From = From,To #; print("To value is smaller than From, swapping")
-if To-From <= Jitter*2:
-	print(f"File too small ({From=}, {To=}, {Jitter=})"); exit()
-
-from struct import unpack
-
-def ptr2ofs(pofs):
-	# takes a suggested value from the file (from point pofs) as an offset
-	# this offset is further compared to
+T = None # the targets of a folder search, for the worker processes too
+def initWorker(targets):
+	global T
+	T = targets
+
+def searchFile(fn):
+	# the folder search for one file, memory-mapped and decoded a Chunk at a time: returns its report for a JSON line
+	r = {"file": fn}
 	try:
-		return(unpack(Pattern,F[pofs:pofs+PtrSz])[0])
+		with open(fn,'rb') as f:
+			fr,to = bounds(os.fstat(f.fileno()).st_size)
+			if to-fr <= Jitter*2:
+				r["error"] = "too small"; return r
+			at = DataOffset(f); r["data"] = at; hits = []
+			with mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mm:
+				for V,c,e in chunks(mm,fr,to):
+					if T is None: hits += [(i,at,j) for i,j in findPtrs(V,c,e,at,c)] # just the one target
+					else: hits += findTargets(V,c,e,T,c)
+		r["hits"] = hits; r["tables"] = findTables(hits)
 	except Exception as e:
-		print(f"ptr2ofs error at {pofs:08X}:")
-		raise
-
-i = From
-print(f"Searching in "+FileName+"...")
-while i < To:
-	for j in range(-Jitter,Jitter+1):
-		testing = ptr2ofs(i);
-		#print(f"{i:X}{testing:+X}?",end=' ',flush=True)
-		if i*Rel+j+testing == DataAt:
+		r["error"] = str(e)
+	return r
+
+def main():
+	global FileName, Targets, Ext, Jobs, Out
+	ap = argparse.ArgumentParser(description="Finds the pointers referencing data in a file, or in all files of a folder.")
+	ap.add_argument("file",nargs="?",default=FileName,help=f"the file or folder to look in (default: {FileName})")
+	ap.add_argument("--targets",default=Targets,metavar="LIST",help="a file with the offsets to look for, one per line")
+	ap.add_argument("--jobs",type=int,default=Jobs,metavar="N",help="search a folder with N processes, 0 for all the CPU cores")
+	ap.add_argument("--out",default=Out,metavar="FILE",help=f"where a folder search writes its JSON lines (default: {Out})")
+	a = ap.parse_args()
+	if os.path.exists(a.file):
+		FileName = a.file
+	else:
+		print("Error: could not find "+a.file+". Did you forget the quotes?")
+		exit(-1)
+	Targets = a.targets; Jobs = a.jobs or os.cpu_count(); Out = a.out; Ext = Ext.lower()
+
+	if os.path.isdir(FileName): # the unattended kind of run
+		files = [fn for fn,_ in filelist.files(FileName,Ext)]
+		targets = loadTargets(Targets) if Targets else None
+		print(f"Searching in {len(files)} files of "+FileName+"...")
+		o = open(Out,"w",encoding="utf-8"); found = 0
+		if Jobs > 1:
+			with ProcessPoolExecutor(Jobs,initializer=initWorker,initargs=(targets,)) as pool:
+				for r in pool.map(searchFile,files,chunksize=16): # in order, as soon as they're ready
+					o.write(json.dumps(r)+"\n"); found += bool(r.get("hits"))
+		else:
+			initWorker(targets)
+			for fn in files:
+				r = searchFile(fn); o.write(json.dumps(r)+"\n"); found += bool(r.get("hits"))
+		o.close()
+		print(f"Done. {found} files have hits, see {Out}.")
+		return
+
+	F = open(FileName,'rb').read()
+	fr,to = bounds(len(F))
+	if to-fr <= Jitter*2:
+		print(f"File too small (From={fr}, To={to}, {Jitter=})"); exit()
+
+	print(f"Searching in "+FileName+"...")
+	if Targets == "":
+		for i,j in (h for V,c,e in chunks(F,fr,to) for h in findPtrs(V,c,e,DataAt,c)):
 			if j == 0:
 				print(f"Found [{i:04X}]")
 			else:
 				print(f"~Found [{i:04X}]{j:+X}")
-	i += 1
+	else:
+		T = loadTargets(Targets)
+		hits = [h for V,c,e in chunks(F,fr,to) for h in findTargets(V,c,e,T,c)]
+		for i,t,j in hits:
+			if j == 0:
+				print(f"Found [{i:04X}] -> {t:04X}")
+			else:
+				print(f"~Found [{i:04X}]{j:+X} -> {t:04X}")
+		for start,stride,ts in findTables(hits):
+			print(f"Table [{start:04X}], {len(ts)} pointers every {stride:X}: {','.join(f'{t:04X}' for t in ts)}")
+
+	input("Done. Press <Enter>")
 
-input("Done. Press <Enter>")
\ No newline at end of file
+if __name__ == "__main__":
+	main()
@@ -11,7 +11,29 @@ I̶'̶m̶ t̶o̶o̶ l̶a̶z̶y̶ t̶o̶ e̶x̶c̶l̶u̶d̶e̶ i̶t̶ f̶r̶o̶m
 files having the same signature as my script!)
 
 Filter the search by the file extension below to limit what files it'll look at.
-The base offset, max size, signedness, and number of iterations are also set up below.
+With --jobs N, the files are split between N processes (0 is for all the CPU cores you have),
+each running getVariables() on its own share; the report is the same as with one.
+With --cache, what getVariables() finds is kept in rescache.bin, so the next runs only call it for the files
+(or the getVariables()) that have changed since.
+With --dedupe, the byte-identical copies of a file are only looked at once (findranges.ext.dupes.txt
+tells which file stood for which copies), so a hundred copies of one file don't pass for a hundred samples.
+With --tail, the files are lined up at their ends instead, for the formats with their magic in a trailer:
+only the last Sz × Items bytes of each one are read (BaseOfs is then how far before the end they stop),
+the last item being the one right at the end, and the offsets in the reports count back from there (-0001 is the last byte).
+The .zip and .tar(.gz) files in the folder (or the one you give instead of it) are looked into, unless Archives
+is off: getVariables() gets their files as they are in there, with nothing extracted (see filelist.py).
+While a file is looked at, the next Ahead ones (or --ahead K) are read on threads, getVariables() and all
+(that one file at a time, as it sets the globals),
+so the disk or the network share doesn't keep the CPU waiting. --ahead 0 reads them one at a time.
+With --profile, the time every phase takes (and the bytes, files/s, the slowest files, the Hopes file by file)
+goes to findranges.ext.metrics.json; --profile callback also cProfiles getVariables() into findranges.ext.callback.prof.
+With --jobs, the workers' getVariables() times and slowest files add up, and the Hopes go a shard at a time
+(but --profile callback goes through the files in one process, for cProfile to see the calls).
+The base offset, max size, and number of iterations are also set up below.
+Both the unsigned and the signed int8 pictures (they're different, look at both!) come out of the same run:
+findranges.ext.txt and findranges.ext.signed.txt respectively.
+So do the 16- and 32-bit fields at every aligned offset (little and big endian), with their ranges,
+distinct value counts and the bits that never change, all in findranges.ext.fields.txt.
 
 You really want to take a look at the getVariables() function. And maybe adjust it, too,
 if you're researching a format where you sort of know where some structures are, but want to
@@ -29,14 +51,15 @@ Conceived and created by Kaens Bard, 2024.
 Works on CPython 3.13.
 """
 
-import array, signal, sys, os, tqdm
+import argparse, mmap, signal, sys, os, threading, time, tqdm
+import numpy as np
+import filelist, metrics, readahead, rescache
 from struct import unpack as su
 
 # CHANGE THESE TO FIT YOUR NEEDS:
 Ext = "" # "" for any, otherwise style it as ".ext"
-Signed = False # True if you want to look into signed int8 (it's a different picture, try both!)
 # These 4 variables ↓ may need changing file by file depending on
-#the structures being researched. Do so from getVariables.
+#the structures being researched. Do so from getVariables, which starts from these values for every file.
 # ↓ the base offset to start looking from. Set to 0 if you don't know anything about the files yet.
 BaseOfs = 0
 # ↓ the single structure size. Set to a manageable value (0x100?) and Items to 1 if unknown.
@@ -45,6 +68,15 @@ Sz = 0x200
 # ↓ the number of structures you're researching. Set to 1 if unknown.
 # Affects the report length, drastically because it's how many times Sz bytes will be read.
 Items = 1
+Jobs = 1 # how many processes to go through the files with (or --jobs N), 0 for all the CPU cores
+Widths = (2,4) # the word/long fields to also look into at every aligned offset, both endiannesses; () for just bytes
+DistinctCap = 0x100 # stop counting a field's distinct values past this many
+DistinctBatch = 0x100000 # how many field values to gather before sorting them in with the distinct ones
+Cache = False # remember what getVariables() found in each file until it or the file changes (or --cache)
+Dedupe = False # look at the byte-identical files just once (or --dedupe)
+Archives = True # look into the .zip and .tar(.gz) files as if they were folders, see filelist.py
+Tail = False # line the files up at their ends instead (or --tail), BaseOfs then being how far before the end to stop
+Ahead = readahead.Ahead # read this many files ahead on threads while going through them (or --ahead K), 0 for one at a time
 
 # After these settings, (Sz × Items) bytes will be read from the BaseOffset position.
 
@@ -94,92 +126,244 @@ def getVariables(file):
 
 # MAIN CODE
 
-if len(sys.argv) > 1:
-	BaseDir = sys.argv[1]
-else:
-	BaseDir = "."
-
-Ext = Ext.lower()
-
+Configured = (BaseOfs,Sz,Items) # what every getVariables() call starts from, whatever the file before it set
 # Ctrl+C processing
 Quit = False
 def signal_handling(signum,frame):
 	global Quit
 	Quit = True; print(" Esc key pressed, breaking off")
-signal.signal(signal.SIGINT,signal_handling)
-
-print("Enumerating files...",end='',flush=True)
-
-# prep the file dict (relative-pathed fnames, sizes without base offsets)
-Df = []; base = 0
-
-for root,_,files in os.walk(BaseDir):
-	for f in files:
-		if Quit: break
-		if (Ext == "") or (os.path.splitext(f)[1].lower() == Ext):
-			fn = os.path.normcase(os.path.join(root,f))
-			Df.append(fn)
-
-print(" done.")
-if len(Df) < 2:
-	print("At least have 2 files to start the search! Aborting.")
-	exit()
 
-print("Processing...")
-
-Hope = Sz
-mSz = sys.maxsize; MSz = -1; mItems = sys.maxsize; MItems = -1
-
-m = array.array('i',(0xFF for x in range(Sz))) #min
-M = array.array('i',(-0xFF for x in range(Sz))) #max
-hopeYet = array.array('i',(True for x in range(Sz))) #whether to even check
-V = []
-for i in range(0,Sz): V.append(set()) #possible values
-
-for fn in tqdm.tqdm(Df, ncols=os.get_terminal_size().columns-4,ascii=True):
-	if Quit: break
-
-	f = open(fn,'rb')
-	res = getVariables(f)
-	if res < 0: print(f"\nFilename {fn}: attributes error {res}! {BaseOfs=}\n"); continue
-	fszb = f.seek(0,2) - BaseOfs
+def hopes(P):
+	# how many offsets have yet to see both 00 and FF, and both -80 and 7F
+	return len(P)-int(np.count_nonzero((P[:,0] & 1) & (P[:,31] >> 7))), len(P)-int(np.count_nonzero((P[:,16] & 1) & (P[:,15] >> 7)))
+
+class FieldStats:
+	# the running statistics of the w-byte fields at every aligned offset, in one endianness ("<" or ">").
+	#They merge with the ones of other files or shards just the same
+	def __init__(self,w,e,n):
+		self.w = w; self.e = e; self.dt = np.dtype(f"{e}u{w}")
+		self.mn = np.full(n,0xFFFFFFFF,dtype=np.uint32); self.mx = np.zeros(n,dtype=np.uint32)
+		self.AND = np.full(n,0xFFFFFFFF,dtype=np.uint32); self.OR = np.zeros(n,dtype=np.uint32)
+		self.has = np.zeros(n,dtype=bool) # whether a field has had any values at all
+		self.many = np.zeros(n,dtype=bool) # whether a field is past DistinctCap values
+		self.keys = np.zeros(0,dtype=np.uint64) # field number << 32 | value, for the distinct values
+		self.new = []; self.pending = 0 # the keys not sorted in yet, and how many
+
+	def distinct(self,keys):
+		# adds to the distinct values, sorting them in only once there's more of them than of the ones in already,
+		#so a file costs about as much as its own keys and not all of them so far
+		self.new.append(keys[~self.many[keys >> np.uint64(32)]]); self.pending += len(self.new[-1])
+		if self.pending > max(len(self.keys),DistinctBatch): self.flush()
+
+	def flush(self):
+		# sorts in the keys gathered, dropping the fields that have had too many. Only the new ones get sorted,
+		#the ones in already just get merged with them (np.unique() would hash or sort all of them every time)
+		if not self.new: return
+		N = np.concatenate(self.new); N.sort(); self.new = []; self.pending = 0
+		K = np.concatenate((self.keys,N)); K.sort(kind='stable') # two sorted runs, so timsort just merges them
+		first = np.ones(len(K),dtype=bool); first[1:] = K[1:] != K[:-1]; self.keys = K[first]
+		self.many |= np.bincount(self.keys >> np.uint64(32),minlength=len(self.many)) > DistinctCap
+		self.keys = self.keys[~self.many[self.keys >> np.uint64(32)]]
+
+	def add(self,X,at=0):
+		# takes the rows of bytes X (items × bytes) that go from the offset at on, as many whole fields as there are
+		s = -at % self.w; k = (at+s)//self.w # the first whole field
+		m = min((X.shape[1]-s)//self.w,len(self.mn)-k)
+		if X.shape[0] == 0 or m <= 0: return
+		V = np.ascontiguousarray(X[:,s:s+m*self.w]).view(self.dt).astype(np.uint32) # the fields of every item at once
+		self.mn[k:k+m] = np.minimum(self.mn[k:k+m],V.min(0)); self.mx[k:k+m] = np.maximum(self.mx[k:k+m],V.max(0))
+		self.AND[k:k+m] &= np.bitwise_and.reduce(V,0); self.OR[k:k+m] |= np.bitwise_or.reduce(V,0); self.has[k:k+m] = True
+		self.distinct((np.arange(k,k+m,dtype=np.uint64) << np.uint64(32) | V).ravel())
+
+	def merge(self,o):
+		self.mn = np.minimum(self.mn,o.mn); self.mx = np.maximum(self.mx,o.mx)
+		self.AND &= o.AND; self.OR |= o.OR; self.has |= o.has; self.many |= o.many
+		o.flush(); self.distinct(o.keys)
+
+	def lines(self,lo,hi):
+		# the report lines for the fields within the bytes lo..hi, keyed by offset
+		self.flush(); full = (1 << 8*self.w)-1; d = 2*self.w
+		cnt = np.bincount(self.keys >> np.uint64(32),minlength=len(self.mn))
+		name = f"u{8*self.w}{'le' if self.e == '<' else 'be'}"
+		for k in range(-(-lo//self.w),min(hi//self.w,len(self.mn))):
+			if not self.has[k]:
+				yield k*self.w, f"{name}: -"; continue
+			const = ~(int(self.AND[k]) ^ int(self.OR[k])) & full # the bits that are the same in all values
+			nv = f"{DistinctCap}+" if self.many[k] else str(cnt[k])
+			yield k*self.w, f"{name}: {int(self.mn[k]):0{d}X}..{int(self.mx[k]):0{d}X}, {nv} values, const bits {const:0{d}X}={int(self.AND[k]) & const:0{d}X}"
+
+def newFields(n):
+	# the field statistics for n bytes' worth of offsets, for every width and endianness
+	return [FieldStats(w,e,n//w) for w in Widths for e in "<>"]
+
+class ValueRanges:
+	# every value seen at each offset as a 256-bit presence bitmap P (bit v of the row is byte v>>3, bit v&7),
+	#the same for the wider fields in Fs, and the sizes St = [mSz,MSz,mItems,MItems]. It's what findranges keeps
+	#in every process, and the "ranges" analysis of onepass.py.
+	#With tail, the items are lined up at their ends: the last byte of every one is at the last offset
+	getVariables = None # what window() calls instead of getVariables(), like the one --profile times
+
+	def __init__(self,n=None,tail=None):
+		n = Sz if n is None else n
+		self.P = np.zeros((n,32),dtype=np.uint8); self.Fs = newFields(n); self.tail = Tail if tail is None else tail
+		self.St = [sys.maxsize,-1,sys.maxsize,-1]; self.lastSz = Sz; self.bytes = 0
+
+	def window(self,f,known=None):
+		# calls getVariables(), unless known is what it found last time (cached).
+		#Returns where in the file to look: (offset, how many bytes), or None if the file's skipped
+		global BaseOfs, Sz, Items
+		if known is None: # the files don't come in order with the read-ahead, so none inherits the last one's values
+			BaseOfs,Sz,Items = Configured
+			res = (self.getVariables or getVariables)(f); Found[f.name] = (res,BaseOfs,Sz,Items)
+		else:
+			res,BaseOfs,Sz,Items = known
+		self.lastSz = Sz # the report goes as far as the last file's Sz
+		if res < 0: print(f"\nFilename {f.name}: attributes error {res}! {BaseOfs=}\n"); return None
+		if self.tail: # the items end BaseOfs bytes before the file does, and that's all that gets read
+			end = f.seek(0,2)-BaseOfs
+			if end <= 0: return end+BaseOfs,0 # nothing's left: it's smaller than the base offset
+			return end-min(Sz*Items,end),min(Sz*Items,end)
+		return BaseOfs,Sz*Items
+
+	def feed(self,fn,F,sz=None,items=None):
+		# takes the bytes of a file from its base offset (a uint8 array), returns if there's any hope left.
+		#sz and items are the file's Sz and Items, if the globals have since moved on to another file's
+		P = self.P; St = self.St; self.bytes += len(F)
+		sz = Sz if sz is None else sz; items = Items if items is None else items
+		St[:] = min(sz,St[0]), max(sz,St[1]), min(items,St[2]), max(items,St[3])
+		L = len(P); rows = len(F)//sz if sz else 0 # whole items; a smaller file just has fewer
+		if self.tail: # the part of an item is the first one, and what's there of it is its end
+			r = len(F)-rows*sz if sz else 0; c = max(0,sz-L); p = min(r,L)
+			parts = ((F[r:].reshape(rows,sz)[:,c:],L-sz+c),(F[r-p:r].reshape(1,p),L-p))
+		else: # the part of an item is the last one, and what's there of it is its start
+			n = min(sz,L); r = min(len(F)-rows*sz,n)
+			parts = ((F[:rows*sz].reshape(rows,sz)[:,:n],0),(F[rows*sz:rows*sz+r].reshape(1,r),0))
+		seen = np.zeros((L,256),dtype=bool)
+		for X,at in parts: # all the items at once, as an Items × Sz view
+			seen[np.arange(at,at+X.shape[1]),X] = True
+			for fs in self.Fs: fs.add(X,at)
+		P |= np.packbits(seen,axis=1,bitorder='little')
+		return max(self.hopes()) > 0
+
+	def hopes(self):
+		return hopes(self.P)
+
+	def merge(self,o):
+		# adds up what another process has seen
+		St = self.St; self.P |= o.P; self.bytes += o.bytes
+		St[:] = min(St[0],o.St[0]), max(St[1],o.St[1]), min(St[2],o.St[2]), max(St[3],o.St[3])
+		for fs,ofs in zip(self.Fs,o.Fs): fs.merge(ofs)
+
+	def report(self,ext,lastSz=None):
+		# writes findranges.ext.txt, .signed.txt and .fields.txt as far as lastSz (the last file's Sz).
+		#With tail, that's the last lastSz offsets, written as how far before the end they are
+		lastSz = self.lastSz if lastSz is None else lastSz
+		mSz,MSz,mItems,MItems = self.St; StatSz = len(self.P)
+		lo,hi = (StatSz-min(lastSz,StatSz),StatSz) if self.tail else (0,min(lastSz,StatSz))
+		def at(i): return f"-{StatSz-i:04X}" if self.tail else f"{i:04X}"
+		seen = np.unpackbits(self.P,axis=1,bitorder='little').view(bool)
+		for Signed in (False,True):
+			o = open(f"findranges{ext}{'.signed' if Signed else ''}.txt","w",encoding="cp437")
+			if Signed:
+				o.write(f"   Ranges detected for {ext}\nofs   range   (possible values)\n")
+			else:
+				o.write(f"   Ranges detected for {ext}\nofs   range  not-mask (possible values)\n")
+			for i in range(lo,hi):
+				V = np.flatnonzero(seen[i]) # sorted already
+				if Signed: V = np.concatenate((V[V >= 0x80]-0x100,V[V < 0x80]))
+				V = V.tolist()
+				m,M = (V[0],V[-1]) if V else (0xFF,-0xFF)
+				if Signed:
+					o.write(f"{at(i)}: {m:02X}..{M:02X} ({','.join(hex(x) for x in V)})\n")
+				else:
+					nm = notMask(V)
+					o.write(f"{at(i)}: {m:02X}..{M:02X}, ~{nm} ({','.join(hex(x) for x in V)})\n")
+			o.write(f"\n\n Structure sizes in [{mSz:02X} - {MSz:02X}]; item counts in [{mItems:02X} - {MItems:02X}]\n")
+			o.close()
+		if self.Fs: # all the widths and endiannesses together, offset by offset
+			o = open(f"findranges{ext}.fields.txt","w",encoding="cp437")
+			o.write(f"   Field ranges detected for {ext}\nofs   type: range, distinct values, constant bits=their values\n")
+			for i,l in sorted((x for fs in self.Fs for x in fs.lines(lo,hi)),key=lambda x: x[0]):
+				o.write(f"{at(i)}: {l}\n")
+			o.write(f"\n\n Structure sizes in [{mSz:02X} - {MSz:02X}]; item counts in [{mItems:02X} - {MItems:02X}]\n")
+			o.close()
+
+def scanFile(fn,V,known=None):
+	# feeds a file to the ValueRanges V. known is what getVariables() found in it last time, if cached.
+	#Returns False if the file was skipped, None if it's smaller than the base offset
+	f = filelist.openFile(fn)
+	w = V.window(f,known)
+	if w is None: f.close(); return False
+	ofs,n = w; fszb = f.seek(0,2) - ofs
 	if fszb <= 0:
-		print("The file is smaller than the base offset, aborting.")
-		exit()
-	else:
-		mSz = min(Sz,mSz); MSz = max(Sz,MSz); mItems = min(Items,mItems); MItems = max(Items,MItems)
-
+		f.close(); return None
 	#print(f"In {fn}, there are {Items:02X}h items") #debug
-	f.seek(BaseOfs); F = f.read(Sz*Items); f.close()
-	if Signed:
-		F = [int.from_bytes(F[i:i+1], byteorder='little', signed=True) for i in range(len(F))]
+	# the bytes are looked at right in the memory-mapped file, no copies made
+	if isinstance(f,filelist.Member): # a file in an archive can't be mapped, just the bytes needed get decompressed
+		f.seek(ofs); mm = None; F = np.frombuffer(f.read(min(n,fszb)),dtype=np.uint8)
+	else:
+		mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+		F = np.frombuffer(mm,dtype=np.uint8,count=min(n,fszb),offset=ofs)
 	#print(f"{fn}: read {len(F):04X} bytes") #debug
-	for item in range(Items):
-		#print(f"in {fn}: structure {item:02X}:",end='') #debug
-		for i in range(Sz): #going through offsets:
-			try:
-				b = F[item*Sz+i]
-			except IndexError: # out of range because some file's smaller than this
-				continue
-			except Exception as e:
-				print(f" {fn}, {Items:02X} items: b = F[({BaseOfs:02X}+) {item:02X} * {Sz:02X} + {i:02X}]. Error: {str(e)}"); exit()
-			V[i].add(b) #add it to the possible values set
-			if Signed:
-				hopeYet = m[i] != -128 or M[i] != 127
-			else:
-				hopeYet = m[i] != 0 or M[i] != 255
-			if b < m[i]: m[i] = b #update min value for the offset
-			if b > M[i]: M[i] = b #update max value
-			if hopeYet and (
-				((not Signed) and m[i] == 0 and M[i] == 255)
-				or (Signed and m[i] == -128 and M[i] == 127)):
-					Hope -= 1
-		#print('') #debug
-	if Hope <= 0: print("It's all completely random, alas."); exit()
-del Df
-
-if Quit:
-	print("Program terminated."); exit(1)
+	V.feed(fn,F)
+	del F
+	if mm is not None: mm.close()
+	f.close()
+	return True
+
+VarLock = threading.Lock() # getVariables() works on the globals, so it's one file at a time
+def loadFile(fn,V,known=None):
+	# what scanFile() does up to the feeding, for a read-ahead thread: getVariables() and reading the file
+	#from its base offset. Returns (fn, its (Sz, Items), its bytes), the bytes being False if the file's skipped
+	#and None if it's smaller than the base offset
+	f = filelist.openFile(fn)
+	with VarLock:
+		w = V.window(f,known); got = (Sz,Items)
+	if w is None: f.close(); return fn,got,False
+	ofs = w[0]; fszb = f.seek(0,2) - ofs
+	if fszb <= 0:
+		f.close(); return fn,got,None
+	f.seek(ofs); F = f.read(min(w[1],fszb)); f.close()
+	return fn,got,F
+
+# --jobs N: each worker process keeps its own bitmaps and sizes for a shard of the files,
+#and the parent ORs/mins/maxes them together as they come back
+StatSz = Stop = None # the bitmaps' size and the "it's all random, everyone stop" event
+Profile = False # whether to time getVariables() and the files for --profile
+Found = {} # file → what getVariables() found in it this run, for the cache
+def initWorker(statsz,tail,profile,stop):
+	global StatSz, Stop, Tail, Profile
+	signal.signal(signal.SIGINT,signal.SIG_IGN) # Ctrl+C is for the parent to handle
+	StatSz = statsz; Stop = stop; Tail = tail; Profile = profile
+
+def scanShard(shard):
+	# returns the ValueRanges of a shard of files, how many files it's been through,
+	#the file smaller than its base offset, if there was one, what getVariables() found,
+	#and what --profile has to know of the shard (see metrics.py)
+	V = ValueRanges(StatSz); n = 0; m = metrics.Metrics(Profile)
+	V.getVariables = m.callback(getVariables)
+	Found.clear(); small = None
+	for fn,known in shard:
+		if Stop.is_set(): break
+		t = time.perf_counter(); b = V.bytes
+		res = scanFile(fn,V,known); n += 1; m.file(fn,time.perf_counter()-t,V.bytes-b)
+		if res is None:
+			Stop.set(); small = fn; break
+		if max(V.hopes()) <= 0: Stop.set(); break # random already, no matter what the other shards say
+	V.getVariables = None # the parent has its own
+	return V,n,small,Found,m.part()
+
+def scanJobs(files,V,Jobs,bar,m):
+	# goes through the (file, cached getVariables() results) list on Jobs processes, merging the results
+	#into the ValueRanges V, and what the workers' getVariables() found into Found, and measured into the Metrics m.
+	#Returns the Sz after the last file and the file smaller than its base offset, if there was one
+	lastSz = Sz; small = None
+	for sh,(sV,cnt,small,found,part) in readahead.shards(files,scanShard,Jobs,initWorker,(len(V.P),V.tail,m.on),going=lambda: not Quit):
+		bar.update(cnt); Found.update(found); V.merge(sV); m.merge(part)
+		m.hopes(bar.n,*V.hopes()) # a shard at a time
+		if sh[-1] is files[-1]: lastSz = sV.lastSz # the report goes as far as the last file's Sz, same as one process does
+		if small is not None or max(V.hopes()) <= 0: break
+	return lastSz,small
 
 def hex(x): return f"{x:02X}" #avoids the multiple levels of format {}s
 def notMask(aSet): # finds the bitmask that this value will never fit
@@ -187,18 +371,105 @@ def notMask(aSet): # finds the bitmask that this value will never fit
 	for j in (aSet): b &= ~j
 	return hex(b)
 
-o = open(f"findranges{os.path.splitext(fn)[1]}.txt","w",encoding="cp437")
-if Signed:
-	o.write(f"   Ranges detected for {os.path.splitext(fn)[1]}\nofs   range   (possible values)\n")
-else:
-	o.write(f"   Ranges detected for {os.path.splitext(fn)[1]}\nofs   range  not-mask (possible values)\n")
-for i in range(Sz):
-	V[i] = sorted(V[i])#; print(f"{MinOfs+i:04X}:")
-	if Signed:
-		o.write(f"{i:04X}: {m[i]:02X}..{M[i]:02X} ({','.join(hex(x) for x in V[i])})\n")
-	else:
-		nm = notMask(V[i])
-		o.write(f"{i:04X}: {m[i]:02X}..{M[i]:02X}, ~{nm} ({','.join(hex(x) for x in V[i])})\n")
-o.write(f"\n\n Structure sizes in [{mSz:02X} - {MSz:02X}]; item counts in [{mItems:02X} - {MItems:02X}]\n")
-o.close()
-print(f"Report complete. {Hope} hopes remain.")
\ No newline at end of file
+def main():
+	global Ext, Jobs, Ahead, Tail
+	ap = argparse.ArgumentParser(description="Shows the ranges of values each byte takes across the files in a folder.")
+	ap.add_argument("folder",nargs="?",default=".",help="the folder to look in (default: current)")
+	ap.add_argument("--jobs",type=int,default=Jobs,metavar="N",help="go through the files with N processes, 0 for all the CPU cores")
+	ap.add_argument("--cache",action="store_true",default=Cache,help="reuse the getVariables() results of the previous runs")
+	ap.add_argument("--dedupe",action="store_true",default=Dedupe,help="look at the byte-identical files just once")
+	ap.add_argument("--profile",nargs="?",const="on",choices=("on","callback"),help="time every phase into findranges.ext.metrics.json, 'callback' to cProfile getVariables() too")
+	ap.add_argument("--ahead",type=int,default=Ahead,metavar="K",help="read K files ahead on threads, 0 for one at a time")
+	ap.add_argument("--tail",action="store_true",default=Tail,help="line the files up at their ends, for the trailers")
+	a = ap.parse_args()
+	m = metrics.Metrics(a.profile is not None,a.profile == "callback")
+	BaseDir = a.folder; Jobs = a.jobs or os.cpu_count(); Tail = a.tail
+	Ahead = 0 if a.profile == "callback" else a.ahead # cProfile only sees the main thread's calls
+	if a.profile == "callback": Jobs = 1 # and the worker processes' even less
+
+	Ext = Ext.lower()
+	signal.signal(signal.SIGINT,signal_handling)
+
+	print("Enumerating files...",end='',flush=True)
+
+	# prep the file dict (relative-pathed fnames, sizes without base offsets)
+	Df = []; base = 0
+	with m.phase("enumerate") as p:
+		idx = filelist.FileIndex(); idx.update(BaseDir)
+		files = idx.files(BaseDir,Ext,Archives); total = len(files); groups = {}
+		if a.dedupe: # a copy can't tell anything its original doesn't
+			files,groups = filelist.dupes(files,idx)
+		sizes = dict(files); files = list(sizes)
+		cache = None
+		if a.cache: # the files and getVariables() that haven't changed since don't need to be parsed again
+			cache = rescache.ResultCache(getVariables,idx,repr((BaseOfs,Sz,Items))); keys = cache.keys(files)
+
+		for fn in files:
+			if Quit: break
+			Df.append((fn,cache.get(keys[fn]) if cache else None))
+		p.files = len(Df)
+	idx.save()
+
+	print(f" {cache.hits} cached," if cache else "",end='')
+	print(f" {total-len(Df)} copies," if groups else "",end='')
+	print(" done.")
+	if total < 2:
+		print("At least have 2 files to start the search! Aborting.")
+		exit()
+
+	print("Processing...")
+	t0 = time.perf_counter()
+	if groups: # what the copies would've had read from them
+		skip = sum(len(L)*min(max(sizes[fn]-BaseOfs,0),Sz*Items) for fn,L in groups.items())
+
+	Hope = sHope = Sz # unsigned and signed
+	V = ValueRanges(Sz); V.getVariables = m.callback(getVariables)
+
+	with m.phase("scan") as p:
+		if Jobs > 1:
+			with tqdm.tqdm(total=len(Df), ncols=os.get_terminal_size().columns-4,ascii=True) as bar:
+				lastSz,small = scanJobs(Df,V,Jobs,bar,m); p.files = bar.n; p.bytes = V.bytes
+			if small is not None:
+				print("The file is smaller than the base offset, aborting.")
+				exit()
+			Hope,sHope = V.hopes()
+			if Hope <= 0 and sHope <= 0: print("It's all completely random, alas."); exit()
+		else:
+			def load(x): # on a read-ahead thread
+				t = time.perf_counter(); r = loadFile(x[0],V,x[1])
+				return r+(time.perf_counter()-t,)
+			lastSz = Sz; want = Sz*Items
+			# the bytes waiting are guessed at from the settings, since getVariables() hasn't run on the files yet
+			ahead = readahead.prefetch(Df,load,lambda x: min(sizes[x[0]],want),Ahead,quit=lambda: Quit)
+			for fn,(sz,items),F,t in tqdm.tqdm(ahead, total=len(Df), ncols=os.get_terminal_size().columns-4,ascii=True):
+				if Quit: break
+				if F is None:
+					print("The file is smaller than the base offset, aborting.")
+					exit()
+				c = time.perf_counter(); lastSz = sz # the report goes as far as the last file's Sz
+				if F is not False: V.feed(fn,np.frombuffer(F,dtype=np.uint8),sz,items)
+				n = len(F or b""); m.file(fn,t+time.perf_counter()-c,n); p.files += 1; p.bytes += n
+				Hope,sHope = V.hopes(); m.hopes(p.files,Hope,sHope)
+				if Hope <= 0 and sHope <= 0: print("It's all completely random, alas."); exit()
+			ahead.close()
+	took = time.perf_counter()-t0
+	if cache:
+		for f,r in Found.items(): cache.put(keys[f],r)
+		cache.save()
+	fn = Df[-1][0]; n = len(Df)
+	del Df
+
+	if Quit:
+		print("Program terminated."); exit(1)
+
+	ext = os.path.splitext(fn)[1]
+	with m.phase("report"):
+		V.report(ext,lastSz)
+	if groups: # guessing the copies would've taken as long as the average file did
+		filelist.saveDupes(f"findranges{ext}.dupes.txt",groups)
+		print(f"{total-n} copies not looked at: {skip} bytes not read, ~{took*(total-n)/n:.2f}s of scanning saved.")
+	m.save(f"findranges{ext}")
+	print(f"Report complete. {Hope} hopes remain ({sHope} for signed).")
+
+if __name__ == "__main__":
+	main()
@@ -13,12 +13,36 @@ I̶'̶m̶ t̶o̶o̶ l̶a̶z̶y̶ t̶o̶ e̶x̶c̶l̶u̶d̶e̶ i̶t̶ f̶r̶o̶m
 files having the same signature as my script!)
 
 Additionally, you could filter the search by its extension below, along with the other parameters.
+With --jobs N, the files are compared on N processes at once (0 is for all the CPU cores you have).
+With --window N, only N offsets of every file are compared at a time, which is kind to your RAM
+when you're looking into disk images hundreds of megabytes in size.
+With --quorum 0.95, a byte only has to be the same in 95% of the files, so one corrupted or hacked file
+doesn't ruin the run. The findsigs.ext.quorum.txt then tells how many files have each sig, and which don't.
+With --floating, it looks for the sequences of at least SigAtLeast bytes that every file has at any offset
+(for those tags after a header of varying length), and saves them with their offset spread
+to findsigs.ext.floating.txt. Raise SigAtLeast to 4 or more for it, or you'll drown in common byte pairs.
+With --cache, what BaseOffset() returns is kept in rescache.bin, so the next runs only call it for the files
+(or the BaseOffset()) that have changed since. The first one has to read every file through to hash it, though.
+With --dedupe, the byte-identical copies of a file are only looked at once, and findsigs.ext.dupes.txt lists
+which file stood for which copies. Mind that with --quorum, every bunch of copies then counts as one file.
+With --tail, the files are lined up at their ends instead, for the formats with their magic in a trailer:
+only the last MaxOfs bytes of each one are read (BaseOffset() then says how far before the end to stop),
+and the offsets in the reports are the negative ones, from the end; the .bin and .matches end where the files do.
+The .zip and .tar(.gz) files in the folder (or the one you give instead of it) are looked into, unless Archives
+is off: their files are compared as they are in there, with nothing extracted (see filelist.py).
+While a file is compared, the next Ahead ones (or --ahead K) are read on threads, BaseOffset() and all,
+so the disk or the network share doesn't keep the CPU waiting. --ahead 0 reads them one at a time.
+With --profile, the time every phase takes (and the bytes, files/s, the slowest files, the Hope file by file)
+goes to findsigs.ext.metrics.json; --profile callback also cProfiles BaseOffset() into findsigs.ext.callback.prof.
+With --jobs, the Hope is written down a shard at a time; --window, --quorum and --floating leave it and the slowest files out.
 
 Conceived and created by Kaens Bard, 2022～2024.
 Works on CPython 3.10.5 and PyPy 3.9.
 """
 
-import signal, sys, os, tqdm
+import argparse, math, signal, sys, os, time, tqdm
+import numpy as np
+import filelist, metrics, readahead, rescache
 from struct import unpack as su
 
 # CHANGE THESE TO FIT YOUR NEEDS:
@@ -28,6 +52,15 @@ SigAtLeast = 2 # the minimum length of a sequence of matching bytes to make a si
 AllZeroesGood = False # when the entire sig sequence is zeroes, ignore it — useful for file format detection
 ZeroOutWith = 0 # the output .bin will have this character in the positions that aren't a match
 ansimin = 2 # how many characters an ansi sequence should have for the 'text' conversion to happen in the DiE sig
+Jobs = 1 # how many processes to compare the files with (or --jobs N), 0 for all the CPU cores
+Window = 0 # compare the files this many offsets at a time (or --window N) to stay in bounded memory, 0 for all at once
+Quorum = 1.0 # the share of files a byte has to be the same in (or --quorum 0.95); 1 means all of them. Must be over 0.5
+Floating = False # look for the sequences found in every file at any offset instead (or --floating)
+Cache = False # remember what BaseOffset() returns for each file until it or the file changes (or --cache)
+Dedupe = False # look at the byte-identical files just once (or --dedupe)
+Archives = True # look into the .zip and .tar(.gz) files as if they were folders, see filelist.py
+Tail = False # line the files up at their ends instead (or --tail), BaseOffset() then saying how far before the end
+Ahead = readahead.Ahead # read this many files ahead on threads while comparing (or --ahead K), 0 for one at a time
 def BaseOffset(file):
 	"""
 	This function will analyse each file to know what offset the matchable block starts from in each file.
@@ -55,21 +88,11 @@ def BaseOffset(file):
 
 # MAIN CODE
 
-if len(sys.argv) > 1:
-	BaseDir = sys.argv[1]
-else:
-	BaseDir = "."
-
-if type(ZeroOutWith) is str:
-	ZeroOutWith = ord(ZeroOutWith[0])
-Ext = Ext.lower()
-
 # Ctrl+C processing
 Quit = False
 def signal_handling(signum,frame):
 	global Quit
 	Quit = True; print(" Esc key pressed, breaking off")
-signal.signal(signal.SIGINT,signal_handling)
 
 def DIESig(bs):
 	# creates a Detect-It-Easy signature from bytes
@@ -92,100 +115,475 @@ def DIESig(bs):
 	del s1; s = s.replace("''",""); s += '"'
 	return s
 
-# prep the cache list
-Lc = []
+MatchesTable = bytes.maketrans(b'\x00\x01',b'.x') # how the .matches file shows the match mask
+
+def where(at,base,tail=0):
+	# how the reports write an offset: from the start (or base+) or, with tail (the window's length),
+	#as how far before the end it is (or before base, the end minus BaseOffset())
+	if tail: return f"{'base' if base > 0 else ''}-0x{tail-at:02X}"
+	return f"{'base+' if base > 0 else ''}0x{at:02X}"
+
+class SigReport:
+	# writes the .txt, .matches and .bin reports as the match mask comes in, in one go or window by window.
+	#The files only appear with the first match, and the trailing mismatches never make it in,
+	#unless it's tail bytes long, lined up at the end: then the files end right where the files do
+	def __init__(self,name,base,tail=0):
+		self.name = name; self.base = base; self.tail = tail; self.o = None
+		self.ofs = 0 # the offset of the next byte to come in
+		self.gap = 0 # mismatches since the last match that aren't written yet
+		self.runAt = None; self.run = bytearray() # the running sig suspect
+		self.Hope = self.SusCnt = self.AllZeroes = 0 # sig-like bytes, sigs, and the ill-advised sigs
+		self.sigs = [] # (offset, bytes) of every sig written
+
+	def sus(self):
+		# the running sig suspect ends here
+		if self.runAt is None: return
+		if len(self.run) >= SigAtLeast: # if the length of uninterrupted signature found is over threshold...
+			self.Hope += len(self.run) # the hope byte count now includes this signature
+			if sum(self.run) > 0 or AllZeroesGood: # avoiding stupid (all zeroes) results, or not
+				self.SusCnt += 1 # we have found a signature we can give the user
+				self.sigs.append((self.runAt,bytes(self.run)))
+				self.o.write(f"{DIESig(self.run)}, {where(self.runAt,self.base,self.tail)}\n")
+			else:
+				self.AllZeroes += 1
+		self.runAt = None; self.run = bytearray()
+
+	def fill(self):
+		# writes the mismatches held back
+		while self.gap > 0:
+			g = min(self.gap,0x100000); self.gap -= g
+			self.om.write(b'.'*g); self.ob.write(bytes([ZeroOutWith])*g)
+
+	def feed(self,B,M):
+		# takes the next len(M) reference bytes and their match mask
+		n = len(M)
+		if M.any():
+			if self.o is None:
+				self.o = open(self.name+".txt","w",encoding="cp437")
+				self.om = open(self.name+".matches","wb"); self.ob = open(self.name+".bin","wb")
+			self.fill() # the mismatches before this match go in after all
+			last = n-int(M[::-1].argmax()) # right after the last match
+			self.om.write(M[:last].tobytes().translate(MatchesTable))
+			self.ob.write(np.where(M[:last],B[:last],ZeroOutWith).astype(np.uint8).tobytes()) # mismatches erased
+			self.gap = n-last
+		else:
+			self.gap += n
+		if not M[:1].all(): self.sus() # a suspect carried over from the previous bytes ends right here
+		edges = np.flatnonzero(np.diff(M,prepend=False,append=False)) # where the runs of matches start and end
+		for s,e in zip(edges[0::2].tolist(),edges[1::2].tolist()):
+			if self.runAt is None: self.runAt = self.ofs+s
+			self.run += bytes(B[s:e])
+			if e < n: self.sus()
+		self.ofs += n
+
+	def close(self):
+		self.sus()
+		if self.o is not None and self.tail: # the mismatches up to the end go in after all
+			self.gap += self.tail-self.ofs; self.fill()
+		if self.o is not None:
+			self.o.close(); self.om.close(); self.ob.close() # the file with signatures and the rest
+
+class CommonBytes:
+	# the bytes that every file fed to it has at the same offset from its BaseOffset(): the match mask M
+	#over the first file's bytes B. It's the one-process findsigs run, and the "sigs" analysis of onepass.py
+	def __init__(self,Sz=MaxOfs):
+		self.Sz = self.Hope = Sz; self.B = None; self.M = np.ones(Sz,dtype=bool)
+		self.base = 0; self.n = 0; self.prev = self.last = ""
+
+	def window(self,f):
+		# where in the file to look: (offset, how many bytes)
+		ofs = BaseOffset(f)
+		if ofs > 0: self.base = ofs
+		return ofs,self.Sz
 
-print("Enumerating files...",end='',flush=True)
+	def feed(self,fn,F):
+		# takes the next file's bytes from its base offset (a uint8 array), returns if there's any hope left
+		Sz = self.Sz = min(self.Sz,len(F))
+		if self.B is None:
+			self.B = F[:Sz].copy(); self.Hope = Sz
+		else: # compare against the previous files
+			self.M[:Sz] &= F[:Sz] == self.B[:Sz] # mask out every byte that doesn't match
+			self.Hope = int(np.count_nonzero(self.M[:Sz])) # the hope is whatever is left unmasked
+			self.Sz -= int(self.M[Sz-1::-1].argmax()) if self.Hope > 0 else Sz # crop the size of the checked array
+		self.n += 1; self.prev = self.last; self.last = fn
+		return self.Hope > 0
 
-# prep the file dict (relative-pathed fnames, sizes) and another for base offsets
-Df = {}
-Db = {}
-base = 0
+	def report(self,rep):
+		# hands what's matched to a SigReport
+		if self.Hope > 0: rep.feed(self.B[:self.Sz],self.M[:self.Sz])
+
+def readAt(fn,ofs,n):
+	# n bytes of the file from ofs on. A negative ofs is from where the file ends as it's opened (--tail)
+	f = filelist.openFile(fn); f.seek(ofs,2 if ofs < 0 else 0); F = np.frombuffer(f.read(n),dtype=np.uint8); f.close()
+	return F
+
+# --jobs N: the files are split in shards, and each worker process ANDs its own match mask
+#against the same reference bytes. The parent ANDs the masks together as they come back.
+Ref = Stop = None # the worker's reference bytes and the "no hope, everyone stop" event
+Profile = False # whether to time the files for --profile
+def initWorker(ref,profile,stop):
+	global Ref, Stop, Profile
+	signal.signal(signal.SIGINT,signal.SIG_IGN) # Ctrl+C is for the parent to handle
+	Ref = np.frombuffer(ref,dtype=np.uint8); Stop = stop; Profile = profile
+
+def compareShard(shard,Sz):
+	# returns the packed match mask of a shard of (filename, base offset) pairs, how many files it compared,
+	#the file it ran out of hope at (in which case there's no mask), and what --profile has to know of the shard
+	M = np.ones(Sz,dtype=bool); n = 0; m = metrics.Metrics(Profile)
+	for fn,ofs in shard:
+		if Stop.is_set(): break
+		t = time.perf_counter()
+		M[:Sz] &= readAt(fn,ofs,Sz) == Ref[:Sz]; n += 1; m.file(fn,time.perf_counter()-t,Sz)
+		if not M[:Sz].any():
+			Stop.set(); return None,n,fn,m.part()
+		Sz -= int(M[Sz-1::-1].argmax()) # no need to look past our own last hope
+	return np.packbits(M),n,None,m.part()
+
+def compareJobs(files,B,M,Sz,Jobs,bar=None,m=None):
+	# compares the (filename, base offset) list against B on Jobs processes, ANDing the results into M,
+	#and what the workers measured into the Metrics m, if any.
+	#Returns the new Hope, Sz and the file hope ran out at, if it did
+	Hope = int(np.count_nonzero(M[:Sz])); died = None; done = 0
+	# the next shards get handed out with the size cropped so far
+	for _,(pm,cnt,fn,part) in readahead.shards(files,compareShard,Jobs,initWorker,(bytes(B),m is not None and m.on),lambda: (Sz,),lambda: not Quit):
+		if bar is not None: bar.update(cnt)
+		if m is not None: m.merge(part)
+		done += cnt
+		if pm is None: # that shard alone has masked everything out
+			M[:Sz] = False; Hope = 0; died = fn
+		else:
+			M[:Sz] &= np.unpackbits(pm)[:Sz].view(bool) # the shard's mask is at least as long as ours
+			Hope = int(np.count_nonzero(M[:Sz]))
+		if m is not None: m.hopes(done+1,Hope) # a shard at a time, the reference being the first file
+		if Hope == 0: died = fn; break
+		Sz -= int(M[Sz-1::-1].argmax())
+	return Hope,Sz,died
+
+def compareWindows(Df,Db,Sz,Window,Jobs,rep):
+	# compares the files Window offsets at a time, keeping just that window's reference bytes and mask.
+	#A window stops being compared as soon as it's all masked out. Returns the total Hope
+	files = list(Df.keys()); Hope = 0
+	for w in tqdm.tqdm(range(0,Sz,Window), ncols=os.get_terminal_size().columns-4,ascii=True):
+		if Quit: break
+		n = min(Window,Sz-w)
+		with filelist.mapFile(files[0],Db[files[0]]+w,n) as mm:
+			B = np.frombuffer(mm,dtype=np.uint8,count=n).copy() # the reference window
+		M = np.ones(n,dtype=bool)
+		if Jobs > 1:
+			compareJobs([(fn,Db[fn]+w) for fn in files[1:]],B,M,n,Jobs)
+		else:
+			for fn in files[1:]:
+				if Quit: break
+				with filelist.mapFile(fn,Db[fn]+w,n) as mm:
+					M[:n] &= np.frombuffer(mm,dtype=np.uint8,count=n) == B[:n]
+				if not M[:n].any(): break # nothing left to hope for in this window
+				n -= int(M[n-1::-1].argmax())
+		rep.feed(B,M); Hope += int(np.count_nonzero(M))
+	return Hope
+
+# --quorum Q: a byte only has to be the same in Q of the files. Per offset, a Boyer-Moore majority vote
+#finds the one value that can possibly be that common, then a second pass counts its real support
+def quorumWindow(files,Db,w,n,need):
+	# returns the most common value at each of the offsets w..w+n, and the mask of those found in at least need files
+	B = np.zeros(n,dtype=np.uint8); C = np.zeros(n,dtype=np.int32) # the candidate values and their vote counters
+	for fn in files:
+		if Quit: break
+		F = readAt(fn,Db[fn]+w,n)
+		z = C == 0; B[z] = F[z] # no votes left: this file's byte is the new candidate
+		C += np.where(z | (F == B),1,-1)
+	C[:] = 0 # now for the real support of the candidates
+	for fn in files:
+		if Quit: break
+		C += readAt(fn,Db[fn]+w,n) == B
+	return B, C >= need
 
-for root,_,files in os.walk(BaseDir):
-	for f in files:
+def quorumOutliers(files,Db,sigs):
+	# returns, for every (offset, bytes) sig, the list of files that don't have all of it
+	idx = np.concatenate([np.arange(at,at+len(sig)) for at,sig in sigs])
+	vals = np.frombuffer(b''.join(sig for _,sig in sigs),dtype=np.uint8)
+	starts = np.cumsum([0]+[len(sig) for _,sig in sigs[:-1]])
+	lo = int(idx[0]); idx -= lo; hi = int(idx[-1])+1
+	out = [[] for _ in sigs]
+	for fn in files:
 		if Quit: break
-		if (Ext == "") or (os.path.splitext(f)[1].lower() == Ext):
-			fn = os.path.normcase(os.path.join(root,f))
-			ofs = BaseOffset(open(fn,'rb'))
+		ok = np.logical_and.reduceat(readAt(fn,Db[fn]+lo,hi)[idx] == vals,starts)
+		for k in np.flatnonzero(~ok).tolist(): out[k].append(fn)
+	return out
+
+# --floating: the sequences of at least SigAtLeast bytes found in every file, wherever they are.
+#Every file's k-byte sequences are hashed at once, and the set of hashes common to all files so far
+#only ever shrinks. The runs of common hashes in the smallest file say how long a sequence from each of its offsets
+#can be at most, and that gets narrowed down file by file to what's really found whole in all of them
+def kgrams(F,k):
+	# hashes of all the k-byte sequences in F: exact up to 8 bytes, a polynomial rolling hash mod 2**64 beyond
+	n = max(len(F)-k+1,0); h = np.zeros(n,dtype=np.uint64)
+	mul = np.uint64(0x100 if k <= 8 else 0x100000001B3)
+	for j in range(k):
+		h *= mul; h += F[j:j+n]
+	return h
+
+def hashHits(h,cand):
+	# which of the hashes h are in the sorted cand
+	if len(cand) == 0: return np.zeros(len(h),dtype=bool)
+	pos = np.searchsorted(cand,h); pos[pos == len(cand)] = 0
+	return cand[pos] == h
+
+def floatingSeqs(files,Df,Db,k):
+	# returns the smallest file, its bytes, and for every offset in them how long a sequence from there every file
+	#seems to have at most: up to the end of its run of common hashes, 0 if it's not in one. None if there's none
+	files = sorted(files,key=lambda fn: min(Df[fn],MaxOfs)) # the fewer hashes to start with, the better
+	cand = None
+	for fn in tqdm.tqdm(files, ncols=os.get_terminal_size().columns-4,ascii=True):
+		if Quit: return None
+		h = kgrams(readAt(fn,Db[fn],min(Df[fn],MaxOfs)),k)
+		if cand is None:
+			cand = np.unique(h)
+		else:
+			pos = np.searchsorted(cand,h); hit = hashHits(h,cand)
+			keep = np.zeros(len(cand),dtype=bool); keep[pos[hit]] = True; cand = cand[keep]
+		if len(cand) == 0:
+			print("No hope. Breaking off at "+fn); return None
+	ref = readAt(files[0],Db[files[0]],min(Df[files[0]],MaxOfs))
+	hit = hashHits(kgrams(ref,k),cand); U = np.zeros(len(ref),dtype=np.int64)
+	edges = np.flatnonzero(np.diff(hit,prepend=False,append=False)); s,e = edges[0::2],edges[1::2]
+	U[:len(hit)][hit] = np.repeat(e,e-s)-np.flatnonzero(hit)+k-1 # the run's end, and the k-1 bytes of its last hash
+	return files[0],ref.tobytes(),U
+
+def nextOfs(E,p,e):
+	# the first offset after p whose sequence ends past e (E being where each one ends, -1 for none), or len(E)
+	n = 0x40
+	while p+1 < len(E):
+		w = E[p+1:p+1+n]; i = int(np.argmax(w > e))
+		if w[i] > e: return p+1+i
+		p += len(w); n *= 8 # the longer it's taking, the bigger the steps
+	return len(E)
+
+def floatingVerify(files,Df,Db,seqs,k):
+	# returns {sequence: [min offset, max offset]} for the longest ones found whole in every file.
+	#Every file narrows down how long a sequence from each offset of the smallest one is found in it, with bytes.find():
+	#whole if it can, or the longest part from the start that is. An offset whose sequence is part of one already found
+	#in that file needs no looking up
+	rfn,ref,U = seqs
+	E = np.where(U >= k,np.arange(len(U))+U,-1)
+	for fn in tqdm.tqdm(files, ncols=os.get_terminal_size().columns-4,ascii=True):
+		if Quit: return {}
+		if fn == rfn: continue
+		with filelist.mapFile(fn,Db[fn],min(Df[fn],MaxOfs)) as mm: F = bytes(mm)
+		e = -1 # where the sequences found in this file so far end
+		p = nextOfs(E,-1,e)
+		while p < len(E):
+			lo = max(0,e-p); hi = int(U[p]) # ref[p:e] is there already, ref[p:p+hi] is as much as can be
+			if F.find(ref[p:p+hi]) >= 0: lo = hi
+			else: # it's mostly just what's there already, so going up from that first
+				s = 1
+				while lo+s < hi and F.find(ref[p:p+lo+s]) >= 0: lo += s; s *= 2
+				hi = min(hi,lo+s)
+			while hi-lo > 1:
+				m = (lo+hi)//2
+				if F.find(ref[p:p+m]) >= 0: lo = m
+				else: hi = m
+			if lo < k: U[p] = 0; E[p] = -1
+			else: U[p] = lo; E[p] = p+lo; e = max(e,p+lo)
+			p = nextOfs(E,p,e)
+	# the sequences that aren't a part of the one before them, then of any longer one
+	P = np.flatnonzero(E >= 0); ends = E[P]
+	P = P[ends > np.concatenate(([-1],np.maximum.accumulate(ends)[:-1]))]
+	seqs = []
+	for sq in sorted({ref[p:p+int(U[p])] for p in P.tolist()},key=lambda sq: (-len(sq),sq)):
+		if not any(sq in lq for lq in seqs): seqs.append(sq)
+	found = {sq: [sys.maxsize,-sys.maxsize] for sq in seqs}
+	for fn in files: # where they are
+		if Quit: return {}
+		n = min(Df[fn],MaxOfs)
+		with filelist.mapFile(fn,Db[fn],n) as mm: F = bytes(mm)
+		for sq in seqs:
+			at = F.find(sq)
+			if Tail: at -= n # from where the file ends (or its base)
+			found[sq] = [min(found[sq][0],at),max(found[sq][1],at)]
+	return found
+
+def findFloating(Df,Db,base,name):
+	files = list(Df.keys()); k = max(SigAtLeast,1)
+	seqs = floatingSeqs(files,Df,Db,k)
+	spread = floatingVerify(files,Df,Db,seqs,k) if seqs is not None else {}
+	if Quit:
+		print("Program terminated."); return
+	AllZeroes = 0; o = None
+	for sq,(mn,mx) in sorted(spread.items(),key=lambda x: (x[1][0],-len(x[0]),x[0])):
+		if not (sum(sq) > 0 or AllZeroesGood):
+			AllZeroes += 1; continue
+		if o is None: o = open(name+".floating.txt","w",encoding="cp437")
+		if Tail: o.write(f"{DIESig(sq)}, {where(0,base,-mn)}..{where(0,base,-mx)}\n") # mn and mx count back from the end already
+		else: o.write(f"{DIESig(sq)}, {where(mn,base)}..{where(mx,base)}\n")
+	if o is None:
+		print("  There were no matches at all.")
+	else:
+		o.close()
+		print(f"  {len(spread)-AllZeroes} floating sequences found in all {len(files)} files.",end="")
+		print(f" 0-sequences ignored: {AllZeroes}." if not AllZeroesGood and AllZeroes > 0 else "")
+
+def main():
+	global Ext, ZeroOutWith, Jobs, Window, Quorum, Floating, Ahead, Tail
+	ap = argparse.ArgumentParser(description="Finds the bytes that match across all files in a folder.")
+	ap.add_argument("folder",nargs="?",default=".",help="the folder to look in (default: current)")
+	ap.add_argument("--jobs",type=int,default=Jobs,metavar="N",help="compare the files with N processes, 0 for all the CPU cores")
+	ap.add_argument("--window",type=int,default=Window,metavar="N",help="compare N offsets at a time through mmap, for the huge files")
+	ap.add_argument("--quorum",type=float,default=Quorum,metavar="Q",help="a byte only has to match in this share of the files (0.5 < Q <= 1)")
+	ap.add_argument("--floating",action="store_true",default=Floating,help="find the sequences every file has at any offset")
+	ap.add_argument("--cache",action="store_true",default=Cache,help="reuse the BaseOffset() results of the previous runs")
+	ap.add_argument("--dedupe",action="store_true",default=Dedupe,help="look at the byte-identical files just once")
+	ap.add_argument("--profile",nargs="?",const="on",choices=("on","callback"),help="time every phase into findsigs.ext.metrics.json, 'callback' to cProfile BaseOffset() too")
+	ap.add_argument("--ahead",type=int,default=Ahead,metavar="K",help="read K files ahead on threads, 0 for one at a time")
+	ap.add_argument("--tail",action="store_true",default=Tail,help="line the files up at their ends, for the trailers")
+	a = ap.parse_args()
+	m = metrics.Metrics(a.profile is not None,a.profile == "callback")
+	BaseDir = a.folder; Jobs = a.jobs or os.cpu_count(); Window = a.window; Quorum = a.quorum; Floating = a.floating; Tail = a.tail
+	Ahead = 0 if a.profile == "callback" else a.ahead # cProfile only sees the main thread's calls
+	if not 0.5 < Quorum <= 1:
+		print("The quorum has to be over 0.5 and up to 1. Aborting."); exit()
+
+	if type(ZeroOutWith) is str:
+		ZeroOutWith = ord(ZeroOutWith[0])
+	Ext = Ext.lower()
+	signal.signal(signal.SIGINT,signal_handling)
+
+	print("Enumerating files...",end='',flush=True)
+
+	# prep the file dict (relative-pathed fnames, sizes) and another for base offsets
+	Df = {}
+	Db = {}
+	base = 0
+
+	with m.phase("enumerate") as p:
+		idx = filelist.FileIndex(); idx.update(BaseDir) # the file index knows what's changed since the last run
+		files = idx.files(BaseDir,Ext,Archives); total = len(files); groups = {}
+		if a.dedupe: # a copy can't tell anything its original doesn't
+			files,groups = filelist.dupes(files,idx)
+		cache = None
+		if a.cache: # the files and BaseOffset() that haven't changed since don't need to be parsed again
+			cache = rescache.ResultCache(BaseOffset,idx); keys = cache.keys([fn for fn,_ in files])
+		p.files = len(files)
+	bo = m.callback(BaseOffset)
+	def lookup(x): # on a read-ahead thread, BaseOffset() only looks at its own file
+		fn,ofs,twin = x
+		f = filelist.openFile(fn); size = f.seek(0,2) # the index is for listing: a file edited in place keeps its entry
+		if ofs is None and not twin:
+			f.seek(0); ofs = bo(f)
+		f.close()
+		return fn,size,ofs,x[1] is None and not twin
+	with m.phase("callback") as p:
+		todo = []; first = set() # the identical files of one not cached yet get what it's cached as
+		for fn,_ in files:
+			twin = cache is not None and keys[fn] in first
+			ofs = cache.get(keys[fn]) if cache and not twin else None
+			if cache and ofs is None: first.add(keys[fn])
+			todo.append((fn,ofs,twin))
+		for fn,size,ofs,new in readahead.prefetch(todo,lookup,ahead=Ahead,quit=lambda: Quit):
+			if Quit: break
+			if new:
+				p.files += 1
+				if cache: cache.put(keys[fn],ofs)
+			elif ofs is None: ofs = cache.get(keys[fn])
 			if ofs > 0: base = ofs
-			Df[fn] = os.stat(fn).st_size-ofs
+			Df[fn] = size-ofs
 			Db[fn] = ofs
+	idx.save()
+	if cache:
+		cache.save(); print(f" {cache.hits} cached,",end='')
+	if groups: print(f" {total-len(Df)} copies,",end='')
+
+	print(" done.")
+	if total < 2:
+		print("At least have 2 files to start the search! Aborting.")
+		exit()
+
+	print("Processing...")
+	t0 = time.perf_counter()
 
-print(" done.")
-if len(Df) < 2:
-	print("At least have 2 files to start the search! Aborting.")
-	exit()
-
-print("Processing...")
-
-Hope = Sz = min(min(Df.values()), MaxOfs) #the amount of potential matches, starts as the smallest (filesize - base offset)
-print(f"First {Hope=}")
-if Hope == 0:
-	print("The smallest file has zero length, aborting.")
-	exit()
-else:
-	B = bytearray([0] * Sz) #buffer 
-	M = bytearray([1] * Sz) #match mask
-	F = bytearray([0] * Sz) #current file 
-
-First = True
-oldfn = ""
-
-for fn in tqdm.tqdm(Df.keys(), ncols=os.get_terminal_size().columns-4,ascii=True):
-	if Quit or Hope <= 0:
-		break
-	f = open(fn,'rb'); f.seek(Db[fn]); F = f.read(Sz); f.close()
-	if First:
-		B[:] = F; First = False
-	else: # compare against the previous files
-		for i in range(Sz):
-			if M[i] and F[i] != B[i]: # If there's hope for this byte but it doesn't match
-				M[i] = 0 # mask it out
-				Hope -= 1 # and take the hope for it away
-				if Hope == 0:
-					print("No hope. Breaking off at "+fn+ "; prev. "+oldfn)
+	Hope = Sz = min(min(Df.values()), MaxOfs) #the amount of potential matches, starts as the smallest (filesize - base offset)
+	print(f"First {Hope=}")
+	if Hope == 0:
+		print("The smallest file has zero length, aborting.")
+		exit()
+	if Tail: # the files are read from that far before wherever they end once opened, with just the one seek each
+		for fn in Db: Db[fn] = -Db[fn]-(min(Df[fn],MaxOfs) if Floating else Sz)
+	# the reports are named after the extension of the last file
+	rep = SigReport("findsigs"+os.path.splitext(list(Df.keys())[-1])[1],base,Sz if Tail else 0)
+	if groups:
+		filelist.saveDupes(rep.name+".dupes.txt",groups)
+		skip = sum(len(L)*min(Df[fn],MaxOfs) for fn,L in groups.items()) # what the copies would've had read from them
+	if Floating or Quorum < 1 or Window > 0: # these go through the files over and over, a window or a sequence at a time
+		mode = "--floating" if Floating else "--quorum" if Quorum < 1 else "--window"
+		m.skip("slowest",f"{mode} doesn't time the files one by one"); m.skip("hope",f"{mode} doesn't take the Hope down file by file")
+	if Floating: # a whole other kind of search
+		with m.phase("floating") as p:
+			findFloating(Df,Db,base,rep.name); p.files = len(Df)
+		m.save(rep.name); return
+
+	with m.phase("compare") as p:
+		if Quorum < 1: # majority votes, a window at a time if asked to
+			files = list(Df.keys()); need = math.ceil(Quorum*len(files)-1e-9); Hope = 0
+			for w in tqdm.tqdm(range(0,Sz,Window or Sz), ncols=os.get_terminal_size().columns-4,ascii=True):
+				if Quit: break
+				B,M = quorumWindow(files,Db,w,min(Window or Sz,Sz-w),need)
+				rep.feed(B,M); Hope += int(np.count_nonzero(M)); p.bytes += len(M)*len(files)
+			p.files = len(files)
+		elif Window > 0: # the whole scan happens window by window
+			Hope = compareWindows(Df,Db,Sz,Window,Jobs,rep); p.files = len(Df) # the bytes aren't counted here
+		elif Jobs > 1: # the first file is the reference, the rest are sharded between the workers
+			M = np.ones(Sz,dtype=bool) #match mask, compared in bulk against each file
+			files = list(Df.keys())
+			fn = files[0]; B = readAt(fn,Db[fn],Sz) # the reference bytes
+			with tqdm.tqdm(total=len(files), ncols=os.get_terminal_size().columns-4,ascii=True) as bar:
+				bar.update(1)
+				Hope,Sz,died = compareJobs([(fn,Db[fn]) for fn in files[1:]],B,M,Sz,Jobs,bar,m)
+				p.files = bar.n # the bytes aren't counted here
+			if died is not None:
+				print("No hope. Breaking off at "+died)
+			if Hope > 0 and not Quit:
+				rep.feed(B[:Sz],M[:Sz])
+		else:
+			cb = CommonBytes(Sz)
+			def load(fn): # on a read-ahead thread; cb.Sz only ever shrinks, so it reads enough
+				t = time.perf_counter()
+				return fn,readAt(fn,Db[fn],cb.Sz),time.perf_counter()-t
+			ahead = readahead.prefetch(Df,load,lambda fn: max(0,min(Df[fn],cb.Sz)),Ahead,quit=lambda: Quit or cb.Hope <= 0)
+			for fn,F,t in tqdm.tqdm(ahead, total=len(Df), ncols=os.get_terminal_size().columns-4,ascii=True):
+				if Quit or cb.Hope <= 0:
 					break
-		while Sz > 0 and not M[Sz-1]: # crop the size of the checked array
-			Sz -= 1
-	oldfn = fn
-
-if Quit:
-	print("Program terminated.")
-elif Hope > 0:
-	o = open("findsigs"+os.path.splitext(fn)[1]+".txt","w",encoding="cp437")
-	SusLen = 0 # running sig suspect length
-	SusCnt = 0 # counting sigs
-	AllZeroes = 0 # counting the ill-advised sigs too
-	Hope = 0 # our hope - counting just the sig-like bytes here
-	# add one mismatch at the end to simplify the following algo if a signature continues until the last byte
-	Sz += 1
-	if len(B) == Sz: B.append(0); M.append(0) # not necessary if there were tailing mismatches trimmed
-	for i in range(Sz):
-		if M[i]: # if it's a match
-			SusLen += 1 # simply add the running length for it
-		else: # if it's not, or no longer, a match
-			if SusLen >= SigAtLeast: # if the length of uninterrupted signature found thus far is over threshold...
-				Hope += SusLen # the hope byte count now includes this signature
-				Sus = B[i-SusLen:i] # apprehend the suspect 
-				if sum(Sus) > 0 or AllZeroesGood: # avoiding stupid (all zeroes) results, or not
-					SusCnt += 1 # we have found a signature we can give the user
-					if base > 0:
-						o.write(f"{DIESig(Sus)}, base+0x{i-SusLen:02X}\n")
-					else:
-						o.write(f"{DIESig(Sus)}, 0x{i-SusLen:02X}\n")
-				else:
-					AllZeroes += 1
-			SusLen = 0 # anyway, get ready to find another sig
-			B[i] = ZeroOutWith # and erase the mismatch byte in the binary 
-	o.close() # the file with signatures
-	Sz -= 1 # ignore the final dummy byte
-	open("findsigs"+os.path.splitext(fn)[1]+".matches","wb").write(b''.join([b'x' if b else b'.' for b in M[:Sz]]))
-	open("findsigs"+os.path.splitext(fn)[1]+".bin","wb").write(B[:Sz])
-	print(f"  {Hope} hopes rest in {SusCnt} sequences among {len(Df)} files.",end="")
-	if not AllZeroesGood and AllZeroes > 0:
-		print(f" 0-sequences ignored: {AllZeroes}.")
-	else:
-		print("") 
-elif Hope == 0:
-	print("  There were no matches at all.")
\ No newline at end of file
+				c = time.perf_counter()
+				alive = cb.feed(fn,F)
+				m.file(fn,t+time.perf_counter()-c,len(F)); m.hopes(cb.n,cb.Hope); p.files += 1; p.bytes += len(F)
+				if not alive:
+					print("No hope. Breaking off at "+fn+ "; prev. "+cb.prev)
+			ahead.close()
+			Hope = cb.Hope
+			if Hope > 0 and not Quit:
+				cb.report(rep)
+
+	if Quit:
+		print("Program terminated.")
+	elif Hope > 0:
+		with m.phase("report"):
+			rep.close()
+			if Quorum < 1 and rep.sigs: # who's got which sig, and who hasn't
+				outliers = quorumOutliers(files,Db,rep.sigs)
+				o = open(rep.name+".quorum.txt","w",encoding="utf-8-sig")
+				for (at,sig),out in zip(rep.sigs,outliers):
+					n = len(files)-len(out)
+					o.write(f"{DIESig(sig)}, {where(at,base,rep.tail)}: {n}/{len(files)} files ({n/len(files):.1%})\n")
+					if out: o.write("  - "+', '.join(out)+"\n")
+				o.close()
+		print(f"  {rep.Hope} hopes rest in {rep.SusCnt} sequences among {len(Df)} files.",end="")
+		if not AllZeroesGood and rep.AllZeroes > 0:
+			print(f" 0-sequences ignored: {rep.AllZeroes}.")
+		else:
+			print("") 
+	elif Hope == 0:
+		print("  There were no matches at all.")
+	if groups and not Quit: # guessing the copies would've taken as long as the average file did
+		print(f"  {total-len(Df)} copies not looked at: {skip} bytes not read, ~{(time.perf_counter()-t0)*(total-len(Df))/len(Df):.2f}s of comparing saved.")
+	m.save(rep.name)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,97 @@
+# Where does a long findsigs/findranges run spend its time? With --profile, they keep track of it here:
+#the wall and CPU time of every phase (listing the files, the BaseOffset()/getVariables() calls, the comparing,
+#the reports), the bytes and files it went through, the slowest files, and how the Hope went down file by file.
+# It all goes to script.ext.metrics.json, and "--profile callback" also runs the callback under cProfile,
+#into script.ext.callback.prof (see it with "python -m pstats" or snakeviz), to tell what in it is slow.
+# With --jobs N, the workers keep their own and hand back part() for the parent to merge(); what a mode can't
+#measure at all gets skip()ped, and is left out of the JSON instead of reading as nothing.
+# Without --profile, every call here does next to nothing.
+import cProfile, heapq, json, threading, time
+
+Slowest = 20 # how many of the slowest files to name
+HopeSamples = 10000 # the Hope is written down whenever it changes, until there's this many of those
+
+class Phase:
+	def __init__(self):
+		self.wall = self.cpu = 0.0; self.files = self.bytes = 0
+
+class Metrics:
+	def __init__(self,on=False,callback=False):
+		self.on = on; self.phases = {}; self.slow = []; self.hope = []; self.cb = Phase(); self.lock = threading.Lock()
+		self.skipped = {} # what isn't measured in this run → why
+		self.prof = cProfile.Profile() if on and callback else None
+
+	def phase(self,name):
+		# a context manager adding the time spent in it to the phase: "with m.phase('compare') as p: p.files += 1"
+		return _Timer(self,self.phases.setdefault(name,Phase()))
+
+	def file(self,fn,t,n):
+		# a file took t seconds and n bytes
+		if not self.on: return
+		if len(self.slow) < Slowest: heapq.heappush(self.slow,(t,fn,n))
+		elif t > self.slow[0][0]: heapq.heapreplace(self.slow,(t,fn,n))
+
+	def hopes(self,n,*hope):
+		# the Hope (or Hopes) after n files
+		if self.on and len(self.hope) < HopeSamples and (not self.hope or self.hope[-1][1:] != list(hope)):
+			self.hope.append([n,*hope])
+
+	def skip(self,what,why):
+		# "slowest" or "hope" can't be told in this run, for this reason
+		self.skipped[what] = why
+
+	def part(self):
+		# what a worker process has measured, for the parent's merge(): the callback's times and its slowest files
+		return (self.cb.wall,self.cb.cpu,self.cb.files,self.slow) if self.on else None
+
+	def merge(self,part):
+		if part is None: return
+		w,c,n,slow = part
+		self.cb.wall += w; self.cb.cpu += c; self.cb.files += n
+		for t,fn,b in slow: self.file(fn,t,b)
+
+	def callback(self,func):
+		# func, timed (and profiled) on every call when on
+		if not self.on: return func
+		def timed(*a,**k):
+			w = time.perf_counter(); c = time.process_time()
+			if self.prof is not None: self.prof.enable()
+			try:
+				return func(*a,**k)
+			finally:
+				if self.prof is not None: self.prof.disable()
+				with self.lock: # the read-ahead threads call it at once
+					self.cb.wall += time.perf_counter()-w; self.cb.cpu += time.process_time()-c; self.cb.files += 1
+		return timed
+
+	def save(self,name):
+		# writes name.metrics.json, and name.callback.prof if the callback was profiled
+		if not self.on: return
+		def rates(p):
+			return {"wall": round(p.wall,4), "cpu": round(p.cpu,4), "files": p.files, "bytes": p.bytes,
+				"files/s": round(p.files/p.wall,1) if p.wall else None, "MB/s": round(p.bytes/p.wall/1e6,2) if p.wall else None}
+		M = {"phases": {k: rates(p) for k,p in self.phases.items()},
+			"total": {"wall": round(sum(p.wall for p in self.phases.values()),4), "cpu": round(sum(p.cpu for p in self.phases.values()),4),
+				"bytes": sum(p.bytes for p in self.phases.values())},
+			"callback": {"calls": self.cb.files, "wall": round(self.cb.wall,4), "cpu": round(self.cb.cpu,4),
+				"per call": round(self.cb.wall/self.cb.files,6) if self.cb.files else None},
+			"slowest": [{"file": fn, "seconds": round(t,6), "bytes": n} for t,fn,n in sorted(self.slow,reverse=True)],
+			"hope": self.hope}
+		for k,why in self.skipped.items():
+			del M[k]; print(f"No {k} in the metrics: {why}.")
+		if self.skipped: M["not measured"] = self.skipped
+		json.dump(M,open(name+".metrics.json","w",encoding="utf-8"),indent=1)
+		if self.prof is not None: self.prof.dump_stats(name+".callback.prof")
+		print(f"Metrics saved to {name}.metrics.json"+(f" and {name}.callback.prof" if self.prof is not None else "")+".")
+
+class _Timer:
+	def __init__(self,m,p):
+		self.m = m; self.p = p
+
+	def __enter__(self):
+		if self.m.on: self.w = time.perf_counter(); self.c = time.process_time()
+		return self.p
+
+	def __exit__(self,*exc):
+		if self.m.on: self.p.wall += time.perf_counter()-self.w; self.p.cpu += time.process_time()-self.c
+		return False
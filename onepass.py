@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+OnePass runs FindSigs, FindRanges and SigWars over a folder at once, reading every file once.
+
+Looking into a new format, you'll likely want all three, and each of them walking the folder
+and reading the same headers again means three times the I/O. Here, the folder is listed once,
+every file is opened once, and the bytes all of the analyses want from it are read in one go
+(or memory-mapped, if that's a lot of bytes), then handed to each of them.
+
+The analyses are set up in their own scripts, same as always: MaxOfs and BaseOffset() in findsigs.py,
+Sz, Items and getVariables() in findranges.py, Ofs and Sz in sigwars.py. Edit those, then run this
+with the folder name. --only sigs,ranges picks some of them.
+The reports are the same ones they write: findsigs.ext.txt/.matches/.bin, findranges.ext.txt/.signed.txt/
+.fields.txt and sigwars.ext.txt. The --jobs, --window, --sweep and such modes are their own scripts' business.
+
+Conceived and created by Kaens Bard, 2024.
+Works on CPython 3.13.
+"""
+
+import argparse, mmap, signal, os, tqdm
+import numpy as np
+import filelist, findsigs, findranges, sigwars
+
+# CHANGE THESE TO FIT YOUR NEEDS:
+Ext = "" # "" for any, otherwise style it as ".ext"
+Analyses = "sigs,ranges,wars" # which ones to run (or --only)
+MmapAt = 0x100000 # the files wanted this many bytes from or more get memory-mapped instead of read
+
+# MAIN CODE
+
+# Ctrl+C processing
+Quit = False
+def signal_handling(signum,frame):
+	global Quit
+	Quit = True; print(" Esc key pressed, breaking off")
+
+def feedFile(fn,As):
+	# asks the analyzers where they want to look in a file, reads all of it at once and hands each its part.
+	#Returns the analyzers that still have hope, and how many bytes of the file that took
+	f = open(fn,'rb'); size = f.seek(0,2); W = []
+	for A in As:
+		f.seek(0); w = A.window(f) # the callbacks seek wherever they like
+		if w is not None: W.append((A,w[0],max(0,min(w[0]+w[1],size)-w[0])))
+	if not W:
+		f.close(); return As,0
+	lo = min(ofs for _,ofs,_ in W); hi = max(ofs+n for _,ofs,n in W)
+	mm = None; read = max(0,hi-lo)
+	if hi-lo >= MmapAt:
+		mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ); lo = 0
+		F = np.frombuffer(mm,dtype=np.uint8)
+	else:
+		f.seek(lo); F = np.frombuffer(f.read(max(0,hi-lo)),dtype=np.uint8)
+	done = {A for A,ofs,n in W if not A.feed(fn,F[ofs-lo:ofs-lo+n])}
+	del F
+	if mm is not None: mm.close()
+	f.close()
+	return [A for A in As if A not in done],read
+
+def main():
+	ap = argparse.ArgumentParser(description="Runs findsigs, findranges and sigwars over a folder in one pass.")
+	ap.add_argument("folder",nargs="?",default=".",help="the folder to look in (default: current)")
+	ap.add_argument("--only",default=Analyses,metavar="LIST",help="the analyses to run, out of sigs,ranges,wars")
+	a = ap.parse_args()
+	only = a.only.split(",")
+	if type(findsigs.ZeroOutWith) is str:
+		findsigs.ZeroOutWith = ord(findsigs.ZeroOutWith[0])
+	signal.signal(signal.SIGINT,signal_handling)
+
+	print("Enumerating files...",end='',flush=True)
+	Fs = [fn for fn,_ in filelist.files(a.folder,Ext)]
+	print(" done.")
+	if len(Fs) < 2:
+		print("At least have 2 files to start the search! Aborting.")
+		exit()
+
+	print("Processing...")
+	As = {}
+	if "sigs" in only: As["sigs"] = findsigs.CommonBytes(findsigs.MaxOfs)
+	if "ranges" in only: As["ranges"] = findranges.ValueRanges(findranges.Sz)
+	if "wars" in only: As["wars"] = sigwars.Variants(sigwars.Ofs,sigwars.Sz)
+	left = list(As.values()); ext = ""
+	for fn in tqdm.tqdm(Fs, ncols=os.get_terminal_size().columns-4,ascii=True):
+		if Quit or not left: break
+		left,_ = feedFile(fn,left); ext = os.path.splitext(fn)[1]
+	if Quit:
+		print("Program terminated."); exit(1)
+
+	if "sigs" in As:
+		cb = As["sigs"]
+		if cb.Hope > 0:
+			rep = findsigs.SigReport("findsigs"+ext,cb.base); cb.report(rep); rep.close()
+			print(f"findsigs: {rep.Hope} hopes rest in {rep.SusCnt} sequences among {cb.n} files.")
+		else:
+			print(f"findsigs: there were no matches at all, no hope left at {cb.last}.")
+	if "ranges" in As:
+		V = As["ranges"]; Hope,sHope = V.hopes()
+		if Hope <= 0 and sHope <= 0:
+			print("findranges: it's all completely random, alas.")
+		else:
+			V.report(ext); print(f"findranges: {Hope} hopes remain ({sHope} for signed).")
+	if "wars" in As:
+		As["wars"].report(Ext); print(f"sigwars: {len(As['wars'].L)} variants.")
+	print("Report complete.")
+
+if __name__ == "__main__":
+	main()
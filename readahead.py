@@ -0,0 +1,54 @@
+# Reads the next few files on threads while the current one is being compared, so the disk (or the network share)
+#and the CPU don't take turns waiting for each other. findsigs and findranges go through their files with it,
+#calling BaseOffset()/getVariables() on those threads too.
+# The files still come out in order, no more than Ahead of them are being read at a time, and what's been read
+#but not taken yet is kept under Budget bytes (going by the caller's guess of each file's bytes).
+# The --jobs N of findsigs, findranges and sigcheck hand the files out to processes in shards with shards() below.
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import Event
+
+Ahead = 8 # how many files to read ahead, 0 to read each one only when it's needed
+Budget = 0x4000000 # how many bytes may be waiting to be taken
+
+def prefetch(items,load,cost=lambda x: 0,ahead=Ahead,budget=Budget,quit=lambda: False):
+	# yields load(x) for every x in items, in order, the next ones loading on ahead threads as long as
+	#their cost(x) adds up to no more than budget (the next one always goes). Stops loading once quit() says so
+	if ahead <= 0:
+		for x in items:
+			if quit(): return
+			yield load(x)
+		return
+	items = iter(items); pending = deque(); held = 0; more = True
+	pool = ThreadPoolExecutor(ahead)
+	try:
+		while True:
+			while more and len(pending) < ahead and (not pending or held < budget) and not quit():
+				x = next(items,pending) # the deque stands for "no more items"
+				if x is pending: more = False; break
+				c = cost(x); pending.append((pool.submit(load,x),c)); held += c
+			if not pending or quit(): return
+			r,c = pending.popleft(); held -= c
+			yield r.result()
+	finally: # done, broken off, or Ctrl+C: whatever's not started yet never will be
+		pool.shutdown(wait=False,cancel_futures=True)
+
+def shards(items,work,jobs,init,initargs=(),args=lambda: (),going=lambda: True):
+	# yields (shard, work(shard,*args())) for the shards the items are split in, run on jobs processes,
+	#as soon as each one's done. The next shards get handed out as those come back, with whatever args() says then,
+	#so no more than jobs*2 are ever waiting. The workers start with init(*initargs,stop), stop being the event
+	#that gets set once going() says no or the caller's had enough: the busy workers are to check it and let go
+	n = max(1,min(256,len(items)//(jobs*4))) # per shard: enough shards to balance the load and stop early
+	todo = deque(items[i:i+n] for i in range(0,len(items),n))
+	stop = Event(); running = {}
+	with ProcessPoolExecutor(jobs,initializer=init,initargs=(*initargs,stop)) as pool:
+		try:
+			while (todo or running) and going():
+				while todo and len(running) < jobs*2:
+					sh = todo.popleft(); running[pool.submit(work,sh,*args())] = sh
+				done,_ = wait(running,timeout=0.2,return_when=FIRST_COMPLETED)
+				for d in done:
+					yield running.pop(d),d.result()
+		finally: # done, no hope, or Ctrl+C: whatever's not started yet never will be
+			stop.set()
+			for r in running: r.cancel()
@@ -0,0 +1,57 @@
+# Remembers what the BaseOffset()/getVariables() kind of functions returned for each file, so that tuning a run
+#on the same files over and over doesn't parse them all over again every time.
+# The results are keyed by the file's content hash (from the file index, see filelist.py) and the hash of the
+#function's source, so editing the function or the file gets it called again. The least recently used results
+#go first once the cache grows past CacheSize.
+import hashlib, inspect, os, pickle, zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CacheFile = "rescache.bin" # where the results are kept
+CacheSize = 0x4000000 # how big it may grow on disk, in bytes
+Threads = 16 # how many files to hash at once when they aren't in the index yet
+
+def sourceHash(func,salt=""):
+	# the hash of a function's source, and of whatever else (salt) its results depend on
+	try:
+		src = inspect.getsource(func)
+	except (OSError,TypeError):
+		src = repr(func.__code__.co_code)+repr(func.__code__.co_consts)
+	return hashlib.blake2b((src+salt).encode('utf-8'),digest_size=16).hexdigest()
+
+class ResultCache:
+	def __init__(self,func,idx,salt="",path=CacheFile):
+		self.idx = idx; self.path = path; self.src = sourceHash(func,salt)
+		self.hits = self.misses = 0
+		self.D = OrderedDict() # (content hash, source hash) → result, the most recently used last
+		try:
+			self.D = pickle.loads(zlib.decompress(open(path,'rb').read()))
+		except (OSError,ValueError,EOFError,pickle.UnpicklingError,zlib.error):
+			pass # no cache or a broken one: it's all getting computed then
+
+	def key(self,fn):
+		return (self.idx.hash(fn),self.src)
+
+	def keys(self,files):
+		# the keys of many files, hashed on Threads threads where the index doesn't know them yet
+		with ThreadPoolExecutor(Threads) as pool:
+			return dict(zip(files,pool.map(self.key,files)))
+
+	def get(self,k):
+		# the result stored for the key k, or None
+		if k in self.D:
+			self.D.move_to_end(k); self.hits += 1
+			return self.D[k]
+		self.misses += 1
+		return None
+
+	def put(self,k,v):
+		self.D[k] = v; self.D.move_to_end(k)
+
+	def save(self):
+		b = pickle.dumps(self.D,pickle.HIGHEST_PROTOCOL)
+		if len(b) > CacheSize: # drop the least recently used ones, guessing by the average result size
+			for _ in range(len(self.D)-int(len(self.D)*CacheSize/len(b))): self.D.popitem(last=False)
+			b = pickle.dumps(self.D,pickle.HIGHEST_PROTOCOL)
+		open(self.path+".tmp",'wb').write(zlib.compress(b,1))
+		os.replace(self.path+".tmp",self.path)
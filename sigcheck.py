@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+"""
+SigCheck tells how picky the signatures FindSigs and SigWars came up with are,
+before you paste them into Detect It Easy and wait for a whole detection run.
+
+Run it with a folder of files the signatures should NOT detect (the more and the more varied, the better),
+and the signature files: findsigs.ext.txt, findsigs.ext.quorum.txt, findsigs.ext.floating.txt, sigwars.ext.txt...
+Every "sig" line is read from them: the hex bytes, the 'text' runs, and the offset after it
+(0x.., base+0x.., or a 0x....0x.. range for the floating ones). SigWars doesn't write down the offset,
+so the sigs without one are looked for at NoOfs (or --ofs).
+The base+ offsets are from whatever BaseOffset() below says, so copy yours over from findsigs.py.
+The negative ones of findsigs --tail (-0x.., base-0x..) count back from the end of the file (minus the base).
+
+Each file is memory-mapped and only the bytes at the offsets some sig is at get looked at:
+the sigs are indexed by offset and their first bytes, so a hundred sigs at 0 cost one lookup.
+With --jobs N, the files are split between N processes (0 is for all the CPU cores you have).
+Give it --positive FOLDER, the files the sigs SHOULD detect, to see how many of those they miss, too.
+
+The report goes to sigcheck.txt: every sig's false positives (and hits), and, for every signature file,
+how many files have all of its sigs at once, since that's how the sigs of one format are meant to be used.
+
+Conceived and created by Kaens Bard, 2024.
+Works on CPython 3.13.
+"""
+
+import argparse, mmap, os, re, signal
+import numpy as np
+import filelist, readahead
+from struct import unpack as su
+
+# CHANGE THESE TO FIT YOUR NEEDS:
+Ext = "" # "" for any, otherwise style it as ".ext"
+NoOfs = 0 # where the sigs that come without an offset are looked for (or --ofs)
+Jobs = 1 # how many processes to go through the files with (or --jobs N), 0 for all the CPU cores
+Report = "sigcheck.txt"
+
+def BaseOffset(file):
+	"""
+	The same thing as in findsigs.py: where the base+ offsets count from in this file.
+	Return a negative value to have the file's base+ sigs never match.
+	"""
+	return 0
+
+# MAIN CODE
+
+# Ctrl+C processing
+Quit = False
+def signal_handling(signum,frame):
+	global Quit
+	Quit = True; print(" Esc key pressed, breaking off")
+
+SigLine = re.compile(r'^"([^"]*)"(?:,\s*(base(?=[+-]))?\+?(-?0x[0-9A-Fa-f]+)(?:\.\.(?:base)?\+?(-?0x[0-9A-Fa-f]+))?)?')
+SigToken = re.compile(r"'([^']*)'|([0-9A-Fa-f]{2})")
+
+def parseSig(s):
+	# the bytes of a DIESig() string (without the double quotes)
+	b = bytearray(); at = 0
+	for m in SigToken.finditer(s):
+		if m.start() != at: raise ValueError(f"can't read {s[at:m.start()]!r}")
+		b += m.group(1).encode('latin-1') if m.group(1) is not None else bytes.fromhex(m.group(2))
+		at = m.end()
+	if at != len(s): raise ValueError(f"can't read {s[at:]!r}")
+	return bytes(b)
+
+def loadSigs(fns,ofs):
+	# reads the sigs out of the signature files as [(signature file, sig line, bytes, base+, from, to)],
+	#from and to being negative for the ones from the end
+	S = []
+	for fn in fns:
+		for l in open(fn,encoding="latin-1"): # the sigs are all ASCII, whatever the report's encoding
+			m = SigLine.match(l.removeprefix('\xef\xbb\xbf'))
+			if m is None: continue
+			try:
+				b = parseSig(m.group(1))
+			except ValueError as e:
+				print(f"{fn}: {e}, skipping {l.strip()}"); continue
+			if not b: continue
+			lo = int(m.group(3),0) if m.group(3) else ofs
+			hi = int(m.group(4),0) if m.group(4) else lo
+			S.append((fn,m.group(0) if m.group(3) else f"{m.group(0)}, 0x{lo:02X}",b,m.group(2) is not None,lo,hi))
+	return S
+
+def buildIndex(S):
+	# the sigs at a fixed offset go into {(base+, offset): (bytes to read, key length, {first bytes: [sig numbers]})},
+	#the floating ones into [(base+, from, to, sig number)]
+	I = {}; R = []
+	for k,(_,_,b,base,lo,hi) in enumerate(S):
+		if lo == hi: I.setdefault((base,lo),[]).append(k)
+		else: R.append((base,lo,hi,k))
+	for at,L in I.items():
+		n = min(4,min(len(S[k][2]) for k in L)); D = {}
+		for k in L: D.setdefault(S[k][2][:n],[]).append(k)
+		I[at] = (max(len(S[k][2]) for k in L),n,D)
+	return I,R
+
+Sigs = Index = Floating = Groups = None # the sigs, their index, and which sigs come from which signature file
+Stop = None # the "Ctrl+C, everyone stop" event of a worker process
+def setup(sigs):
+	global Sigs, Index, Floating, Groups
+	Sigs = sigs; Index,Floating = buildIndex(sigs)
+	Groups = {}
+	for k,s in enumerate(sigs): Groups.setdefault(s[0],[]).append(k)
+
+def initWorker(sigs,stop):
+	global Stop
+	signal.signal(signal.SIGINT,signal.SIG_IGN) # Ctrl+C is for the parent to handle
+	setup(sigs); Stop = stop
+
+def where(ofs,isBase,base,size):
+	# where a sig's offset is in the file: after the base for base+, before the end (or the end minus the base)
+	#if it's negative. None if the file has no base
+	if isBase:
+		if base < 0: return None
+		ofs += base if ofs >= 0 else -base
+	return ofs+size if ofs < 0 else ofs
+
+def checkFile(fn,H):
+	# adds 1 to H[k] for every sig k the file has, returns the array of them
+	f = open(fn,'rb'); size = f.seek(0,2)
+	if size == 0: f.close(); return H[:0]
+	base = None
+	if any(b for b,_ in Index) or any(r[0] for r in Floating):
+		base = BaseOffset(f)
+	mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+	found = []
+	for (isBase,ofs),(n,kl,D) in Index.items():
+		ofs = where(ofs,isBase,base,size)
+		if ofs is None or ofs < 0 or ofs+kl > size: continue
+		b = mm[ofs:ofs+n]
+		for k in D.get(b[:kl],()):
+			if b.startswith(Sigs[k][2]): found.append(k)
+	for isBase,lo,hi,k in Floating:
+		lo,hi = where(lo,isBase,base,size),where(hi,isBase,base,size)
+		if hi is None or hi < 0: continue
+		lo = max(lo,0)
+		if mm.find(Sigs[k][2],lo,hi+len(Sigs[k][2])) >= 0: found.append(k)
+	mm.close(); f.close()
+	found = np.array(found,dtype=np.int64); H[found] += 1
+	return found
+
+def checkShard(shard):
+	# the hits of every sig in a shard of files, how many files had all the sigs of each signature file,
+	#and how many files it's been through
+	H = np.zeros(len(Sigs),dtype=np.int64); A = dict.fromkeys(Groups,0); n = 0
+	for fn in shard:
+		if Stop is not None and Stop.is_set(): break
+		try:
+			found = set(checkFile(fn,H).tolist())
+		except OSError:
+			continue
+		for g,L in Groups.items():
+			if all(k in found for k in L): A[g] += 1
+		n += 1
+	return H,A,n
+
+def scan(files,Jobs):
+	# goes through the files on Jobs processes (or right here), summing up what checkShard() says
+	H = np.zeros(len(Sigs),dtype=np.int64); A = dict.fromkeys(Groups,0); N = 0
+	def add(r):
+		nonlocal N
+		H[:] += r[0]; N += r[2]
+		for g in A: A[g] += r[1][g]
+	if Jobs > 1:
+		for _,r in readahead.shards(files,checkShard,Jobs,initWorker,(Sigs,),going=lambda: not Quit): add(r)
+	else:
+		for i in range(0,len(files),256):
+			if Quit: break
+			add(checkShard(files[i:i+256]))
+	return H,A,N
+
+def main():
+	global Jobs
+	ap = argparse.ArgumentParser(description="Counts the false positives of the generated DIE signatures.")
+	ap.add_argument("folder",help="the files the sigs should NOT detect")
+	ap.add_argument("sigfiles",nargs="+",help="the findsigs/sigwars reports to take the sigs from")
+	ap.add_argument("--positive",metavar="FOLDER",help="the files the sigs SHOULD detect")
+	ap.add_argument("--ofs",type=lambda x: int(x,0),default=NoOfs,metavar="OFS",help="where the sigs without an offset go")
+	ap.add_argument("--jobs",type=int,default=Jobs,metavar="N",help="check the files with N processes, 0 for all the CPU cores")
+	a = ap.parse_args()
+	Jobs = a.jobs or os.cpu_count()
+	signal.signal(signal.SIGINT,signal_handling)
+
+	setup(loadSigs(a.sigfiles,a.ofs))
+	if not Sigs:
+		print("No sigs in there. Aborting."); exit()
+	print(f"{len(Sigs)} sigs at {len(Index)+len(Floating)} offsets. Enumerating files...",end='',flush=True)
+	neg = [fn for fn,_ in filelist.files(a.folder,Ext)]
+	pos = [fn for fn,_ in filelist.files(a.positive,Ext)] if a.positive else []
+	print(f" {len(neg)} negative{f', {len(pos)} positive' if pos else ''}. Checking...")
+	H,A,N = scan(neg,Jobs)
+	if pos: pH,pA,pN = scan(pos,Jobs)
+	if Quit:
+		print("Program terminated."); exit(1)
+
+	def share(x,n): return f"{x}/{n} ({x/n if n else 0:.2%})"
+	o = open(Report,"w",encoding="utf-8-sig")
+	for g,L in Groups.items():
+		o.write(f"   {g}: all {len(L)} sigs at once: false positives {share(A[g],N)}")
+		o.write(f", hits {share(pA[g],pN)}\n" if pos else "\n")
+		for k in L:
+			o.write(f"{Sigs[k][1]}: false positives {share(int(H[k]),N)}")
+			o.write(f", hits {share(int(pH[k]),pN)}\n" if pos else "\n")
+		o.write("\n")
+	o.close()
+	print(f"Done, see {Report}.")
+
+if __name__ == "__main__":
+	main()
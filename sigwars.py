@@ -4,6 +4,22 @@
 Ext = "" # "" for any, otherwise style it as ".ext"
 Ofs = 0x00
 Sz = 0x04
+Threads = 16 # how many files to read the range from at once, it's mostly waiting for the disk anyway
+# Don't know Ofs and Sz yet? Sweep mode (or --sweep N) reads the first Sweep bytes of each file once, and ranks
+#every window of up to SweepSz bytes in there by how evenly it splits the files into 2..SweepVariants variants,
+#the fewer variants the better among the equally even. A variant has to have 2 files at least, and there have to be
+#fewer variants than half the files, or the bytes that are different in every file would win every time.
+#The top window then gets the usual treatment
+Sweep = 0
+SweepSz = 8
+SweepVariants = 32
+SweepTop = 20 # how many of the best windows to list in sigwars.ext.sweep.txt
+# Dedupe (or --dedupe) reads just one of the byte-identical files, and lists its copies along with it.
+#They don't sway the sweep's idea of an even split then, either
+Dedupe = False
+# The .zip and .tar(.gz) files in the folder (or the one given instead of it) are looked into as if they were folders,
+#and the range is read from their files without extracting them (see filelist.py). Archives = False lists them as files
+Archives = True
 
 """
 Signature Wars is something rather niche
@@ -34,19 +50,17 @@ Useful? Useful.
 
 With minimal edits (like json.dumps(L)), this can be made machine-readable for further automation.
 
+And if you can't tell where the difference is yet, the sweep mode (see below) will look for it.
+
 ---
 Conceived and created by Kaens bard, 2022.
 Works just fine in python 3 or pypy 3.
 """
 
-import os, sys
-
-# The default folder:
-if len(sys.argv)>1:
-	BaseDir = sys.argv[1]
-else:
-	BaseDir = "."
-# CHANGE UNTIL HERE
+import argparse, time
+import numpy as np
+import filelist
+from concurrent.futures import ThreadPoolExecutor
 
 def DIESig(bs):
 	# creates a Detect It Easy signature from bytes
@@ -70,29 +84,101 @@ def DIESig(bs):
 	del s1; s = s.replace("''",""); s += '"'
 	return s
 
-L=[]
-c = 0
-for r,_,ns in os.walk(BaseDir):
-	for n in ns:
-		if Ext == "" or os.path.splitext(n)[1].lower() == Ext.lower():
-			fn = os.path.normcase(os.path.join(r,n))
-			f = open(fn,"rb")
-			f.seek(Ofs)
-			i = f.read(Sz)
-			f.close()
-			sig = DIESig(i)
-			old = False
-			for c in range(len(L)):
-				if L[c][0] == sig:
-					old = True; break
-			if not old:
-				L.append((sig,[fn]))
-			else:
-				L[c][1].append(fn)
-
-o = open("sigwars"+Ext+".txt","w",encoding="utf-8-sig")
-for k,vs in L:
-	o.write(k+"\n  - ")
-	o.write(', '.join(v for v in vs))
-	o.write("\n\n")
-o.close()
\ No newline at end of file
+def readRange(fn,Ofs=Ofs,Sz=Sz):
+	f = filelist.openFile(fn)
+	f.seek(Ofs)
+	i = f.read(Sz)
+	f.close()
+	return i
+
+def sweep(X):
+	# ranks the windows of the files × bytes matrix X (256 past the end of a file) by how even the split they make is
+	#(its entropy over the most there can be with that many variants), returning (entropy, ofs, size, variants), best first.
+	#A window with a variant of one file, or with half as many variants as files, tells nothing and is left out.
+	#All the windows of a size at once: each one's column hash is the hash of the window a byte shorter,
+	#times a prime, plus the next byte
+	N = X.shape[1]; H = np.zeros(X.shape,dtype=np.uint64); res = []
+	for s in range(1,min(SweepSz,N)+1):
+		H = H[:,:N-s+1]*np.uint64(0x100000001B3)+X[:,s-1:]
+		S = np.sort(H,axis=0)
+		new = np.ones(S.shape,dtype=bool); new[1:] = S[1:] != S[:-1] # where each variant starts in a column
+		variants = new.sum(0)
+		for o in np.flatnonzero((variants > 1) & (variants <= SweepVariants) & (variants*2 < len(S))).tolist():
+			c = np.diff(np.append(np.flatnonzero(new[:,o]),len(S))) # how many files of each variant
+			if c.min() < 2: continue
+			p = c/len(S); res.append((float(-(p*np.log2(p)).sum()),o,s,int(variants[o])))
+	# the fewest variants, then the shortest and the earliest of the equally even ones
+	return sorted(res,key=lambda x: (-round(x[0]/np.log2(x[3]),9),x[3],x[2],x[1]))
+
+class Variants:
+	# the files grouped by what they have in the range, in the order each variant is first seen.
+	#It's the "wars" analysis of onepass.py, too
+	def __init__(self,Ofs=Ofs,Sz=Sz):
+		self.Ofs = Ofs; self.Sz = Sz
+		self.L = {} # the raw range contents → the files having them
+
+	def window(self,f):
+		# where in the file to look: (offset, how many bytes)
+		return self.Ofs,self.Sz
+
+	def feed(self,fn,F):
+		self.L.setdefault(bytes(F),[]).append(fn)
+		return True
+
+	def report(self,Ext=Ext,groups={}):
+		# writes sigwars.ext.txt, the copies (see filelist.dupes()) listed right after their originals
+		o = open("sigwars"+Ext+".txt","w",encoding="utf-8-sig")
+		for k,vs in self.L.items():
+			o.write(DIESig(k)+"\n  - ")
+			o.write(', '.join(x for v in vs for x in [v]+groups.get(v,[])))
+			o.write("\n\n")
+		o.close()
+
+def main():
+	global Ofs, Sz
+	# The default folder is the current one
+	ap = argparse.ArgumentParser(description="Groups the files in a folder by the contents of a range.")
+	ap.add_argument("folder",nargs="?",default=".",help="the folder to look in (default: current)")
+	ap.add_argument("--sweep",type=int,default=Sweep,metavar="N",help="find the best range within the first N bytes by itself")
+	ap.add_argument("--dedupe",action="store_true",default=Dedupe,help="read the byte-identical files just once")
+	a = ap.parse_args()
+	BaseDir = a.folder
+
+	idx = filelist.FileIndex(); idx.update(BaseDir)
+	Fs = idx.files(BaseDir,Ext,Archives); total = len(Fs); groups = {}
+	if a.dedupe: # a copy can't have a range its original doesn't
+		Fs,groups = filelist.dupes(Fs,idx)
+	idx.save()
+	Fs = [fn for fn,_ in Fs]
+	t0 = time.perf_counter()
+
+	if a.sweep > 0:
+		X = np.full((len(Fs),a.sweep),256,dtype=np.uint16)
+		with ThreadPoolExecutor(Threads) as pool:
+			for k,i in enumerate(pool.map(lambda fn: readRange(fn,0,a.sweep),Fs)):
+				X[k,:len(i)] = np.frombuffer(i,dtype=np.uint8)
+		W = sweep(X)
+		o = open("sigwars"+Ext+".sweep.txt","w",encoding="utf-8-sig")
+		o.write(f"   The windows splitting {len(Fs)} files best\nofs   size: variants, entropy (evenness)\n")
+		for e,ofs,sz,v in W[:SweepTop]:
+			o.write(f"{ofs:04X}: {sz:X}: {v} variants, {e:.3f} bits ({e/np.log2(v):.0%})\n")
+		o.close()
+		if not W:
+			print("No window splits the files into a handful of variants, alas."); exit()
+		_,Ofs,Sz,_ = W[0]; print(f"The best pick is {Sz} bytes at 0x{Ofs:X}.")
+		V = Variants(Ofs,Sz)
+		for fn,row in zip(Fs,X[:,Ofs:Ofs+Sz]):
+			V.feed(fn,row[row < 256].astype(np.uint8))
+	else:
+		V = Variants()
+		with ThreadPoolExecutor(Threads) as pool:
+			for fn,i in zip(Fs,pool.map(readRange,Fs)):
+				V.feed(fn,i)
+	took = time.perf_counter()-t0
+	if groups:
+		filelist.saveDupes("sigwars"+Ext+".dupes.txt",groups)
+		print(f"{total-len(Fs)} copies not read: ~{(a.sweep or Sz)*(total-len(Fs))} bytes and ~{took*(total-len(Fs))/len(Fs):.2f}s saved.")
+	V.report(Ext,groups)
+
+if __name__ == "__main__":
+	main()
@@ -4,6 +4,14 @@ This script takes the "diec -dbuj testcase > testcase.txt" testcase.txt many-JSO
 that everything has detected properly.
 
 Optionally run with 1 parameter to check that 1 file.
+The dump is read a block at a time and the report is written as it goes, so a testcase of any size
+takes the same little memory. With --jobs N, the JSON gets parsed and checked on N processes
+(0 is for all the CPU cores you have); the report comes out in the same order anyway.
+
+Every run also saves testcase.snap, a compact index of what each file detected as (names, types,
+whether the extension matched, the "short by"s) and what was wrong with it. After updating the signatures,
+run diec again, then this, then "testcase.py --diff old.snap testcase.snap" to only see what's changed:
+the files newly broken, the ones fixed, and the ones detecting differently, in testcase.diff.txt.
 
 Conceived and created by Kaens Bard, 2024.
 Works on CPython 3.13 and PyPy 3.10.
@@ -12,46 +20,44 @@ Works on CPython 3.13 and PyPy 3.10.
 ReportFile = "testcase.report.txt"
 TestCase = "testcase.txt"
 # ↓ heuristics, generics... bad causes for the "multiple detections" alarm
-UselessFPs = ['Amiga loadable file','plain text'] 
+UselessFPs = ['Amiga loadable file','plain text']
 #UselessFPs = ['Raw Deflate stream','.zlib','Amiga loadable file','plain text']
+Jobs = 1 # how many processes to check the files with (or --jobs N), 0 for all the CPU cores
+Batch = 256 # how many files to hand a process at a time
 
-import os,sys,re,json
+import argparse,os,re,json,pickle,zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
-if len(sys.argv) > 1:
-    TestCase = sys.argv[1]
-    ReportFile = f"{os.path.splitext(TestCase)[0]}.report.txt"
+ShortP = re.compile(r"(^|.+\s)sz:\d+\((-\d+)!\)(\s.*|$)")
 
-D = {} # dictionary holding filenames and jsons
+def blocks(fi):
+    # yields the (file path, its JSON) of every block in the dump, as soon as the block's read
+    curblock = []
+    for a in fi:
+        if len(a) < 2:
+            if len(curblock) > 0:
+                # remove the ":" from filename
+                yield curblock[0][:-1], "\n".join(curblock[1:])
+                curblock = []
+        else:
+            curblock.append(a.strip()) # removes newlines
+    if len(curblock) > 0: # no empty line after the last one
+        yield curblock[0][:-1], "\n".join(curblock[1:])
 
-print(f"Parsing {TestCase}...")
-fi = open(TestCase,"r",encoding="utf-8")
-curblock = []
-for a in fi.readlines():
-    if len(a) < 2:
-        if len(curblock) > 0:
-            # remove the ":" from filename = dict key add to dict
-            D[os.path.basename(curblock[0][:-1])] = "\n".join((l for l in curblock[1:]))
-            curblock = []
-    else:
-        curblock.append(a.strip()) # removes newlines
-fi.close()
-print(f"Got {len(D)} files. Writing out the report...")
-fo = open(ReportFile,"w",encoding="utf-8-sig")
-
-for f in D:
-    if D[f].find("Error: ") >= 0:
-        fo.write(f+': '+D[f]+'\n')
-        continue
+def check(f,s):
+    # the report lines for a file f with the diec output s, and its snapshot entry:
+    #(names, types, extension matched, short by, problems)
+    if s.find("Error: ") >= 0:
+        return [f+': '+s+'\n'], ((),(),True,(),(s,))
     try:
-        j = json.loads(D[f])
-        print(f"detects: {len(j['detects'])}")
+        j = json.loads(s)
     except Exception as e:
-        je = f"{f}: JSON error: {e}. Could be _log output\n"
-        fo.write(je); print(je)
-        continue
+        return [f"{f}: JSON error: {e}. Could be _log output\n"], ((),(),True,(),("JSON error",))
+    R = []; names = []; types = []; shorts = []; extOk = True
     for d in j["detects"]:
         if "values" not in d: # this got obsoleted I think
-            fo.write(f"{f}: not detected!\n")
+            R.append(f"{f}: not detected!\n")
         else:
             if(len(d["values"]) > 1):
                 multiple = []
@@ -61,17 +67,17 @@ for f in D:
                         multiple.append(v["name"][v["name"].rfind("(")+1:v["name"].rfind(")")])
                     else:
                         multiple.append(v["name"])
-                if(len(multiple) > 1): fo.write(f"{f}: multiple detections: {multiple}\n")
-                elif(len(multiple) == 0): fo.write(f"{f}: not detected!\n")
+                if(len(multiple) > 1): R.append(f"{f}: multiple detections: {multiple}\n")
+                elif(len(multiple) == 0): R.append(f"{f}: not detected!\n")
 
             extFound = False
             for v in d["values"]:
                 if v["type"] == "Unknown" and v["name"] == "Unknown":
-                    fo.write(f"{f}: not detected!\n")
-                shortp = re.compile(r"(^|.+\s)sz:\d+\((-\d+)!\)(\s.*|$)")
-                shortg = shortp.match(v["info"])
+                    R.append(f"{f}: not detected!\n")
+                names.append(v["name"]); types.append(v["type"])
+                shortg = ShortP.match(v["info"])
                 if shortg != None:
-                    fo.write(f"{f}: short by {shortg.group(2)}\n")
+                    R.append(f"{f}: short by {shortg.group(2)}\n"); shorts.append(int(shortg.group(2)))
                 if not extFound and v["name"].rfind("(") > 0 and v["name"].rfind(")") > 0: # standard extensions/prefixes mentioned
                     exts = []; exts1 = v["name"][v["name"].rfind("(")+1:v["name"].rfind(")")].upper().replace(' ','').split(",")
                     for e in exts1:
@@ -84,8 +90,85 @@ for f in D:
                             break
                 else: extFound = True # for the following line to be true
             if not extFound:
-                fo.write(f"{f}: type mismatch with: {','.join(exts1)}\n")
+                R.append(f"{f}: type mismatch with: {','.join(exts1)}\n"); extOk = False
+    return R, (tuple(names),tuple(types),extOk,tuple(shorts),tuple(r[len(f)+2:-1] for r in R))
+
+def checkBatch(B):
+    # the reports go by the file name, the snapshot by the whole path: the same name can be in many folders
+    return [(p,check(os.path.basename(p),s)) for p,s in B]
+
+def loadSnap(fn):
+    return pickle.loads(zlib.decompress(open(fn,'rb').read()))
 
+def saveSnap(fn,S):
+    open(fn,'wb').write(zlib.compress(pickle.dumps(S,pickle.HIGHEST_PROTOCOL),1))
+
+def diff(old,new,fn):
+    # writes down the files that broke, got fixed or detect differently between the snapshots
+    A = loadSnap(old); B = loadSnap(new)
+    broken = []; fixed = []; changed = []
+    for f,b in B.items():
+        a = A.get(f)
+        if a is None or a == b: continue
+        if b[4] and not a[4]: broken.append(f)
+        elif a[4] and not b[4]: fixed.append(f)
+        else: changed.append(f)
+    gone = [f for f in A if f not in B]; added = [f for f in B if f not in A]
+    def what(e): return f"{', '.join(e[0]) or '(nothing)'}"+(f"; {'; '.join(e[4])}" if e[4] else "")
+    fo = open(fn,"w",encoding="utf-8-sig")
+    fo.write(f"{old} → {new}: {len(broken)} newly broken, {len(fixed)} fixed, {len(changed)} changed, {len(added)} new, {len(gone)} gone\n")
+    for title,L in (("Newly broken",broken),("Fixed",fixed),("Changed",changed)):
+        if not L: continue
+        fo.write(f"\n   {title}:\n")
+        for f in L:
+            fo.write(f"{f}: {what(A[f])}\n  → {what(B[f])}\n")
+    fo.close()
+    print(f"{len(broken)} newly broken, {len(fixed)} fixed, {len(changed)} changed: see {fn}")
+
+def batches(it):
+    B = []
+    for x in it:
+        B.append(x)
+        if len(B) == Batch: yield B; B = []
+    if B: yield B
+
+def main():
+    global TestCase, ReportFile, Jobs
+    ap = argparse.ArgumentParser(description="Checks a diec -dbuj dump for what hasn't detected properly.")
+    ap.add_argument("testcase",nargs="?",default=None,help=f"the dump to check (default: {TestCase})")
+    ap.add_argument("--jobs",type=int,default=Jobs,metavar="N",help="check the files with N processes, 0 for all the CPU cores")
+    ap.add_argument("--diff",nargs=2,metavar=("OLD","NEW"),help="compare two saved snapshots instead")
+    a = ap.parse_args()
+    if a.diff:
+        diff(*a.diff,f"{os.path.splitext(a.diff[1])[0]}.diff.txt"); return
+    if a.testcase:
+        TestCase = a.testcase
+        ReportFile = f"{os.path.splitext(TestCase)[0]}.report.txt"
+    Jobs = a.jobs or os.cpu_count()
+
+    print(f"Parsing {TestCase} and writing out the report...")
+    fi = open(TestCase,"r",encoding="utf-8")
+    fo = open(ReportFile,"w",encoding="utf-8-sig")
+    n = 0; S = {} # file path → snapshot entry
+    def out(R): # the report lines of a batch, in order
+        nonlocal n
+        for f,(L,e) in R:
+            for l in L: fo.write(l)
+            if e[4] == ("JSON error",): print(L[0])
+            S[f] = e
+        n += len(R)
+    if Jobs > 1:
+        with ProcessPoolExecutor(Jobs) as pool:
+            running = deque() # no more than a few batches ahead of the writing, whatever the dump's size
+            for B in batches(blocks(fi)):
+                running.append(pool.submit(checkBatch,B))
+                if len(running) >= Jobs*2: out(running.popleft().result())
+            while running: out(running.popleft().result())
+    else:
+        for B in batches(blocks(fi)): out(checkBatch(B))
+    fi.close(); fo.close()
+    saveSnap(f"{os.path.splitext(ReportFile)[0].removesuffix('.report')}.snap",S)
+    print(f"Got {n} files. Done.")
 
-fo.close()
-print("Done.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()